@@ -1,7 +1,12 @@
 #!/bin/bash
 # Build script for Render.com
-# Run migrations and collect static files
+# Run migrations, backfill product images and variants, refresh sales
+# rollups, build front-end bundles, collect static files
 set -e
 
 python manage.py migrate --noinput
+python manage.py migrate_product_images
+python manage.py generate_image_variants --missing
+python manage.py refresh_sales_rollups
+python manage.py build_assets
 python manage.py collectstatic --noinput --clear
@@ -0,0 +1,84 @@
+"""
+Gunicorn configuration for QueueBlaze (loaded from the working directory).
+
+GUNICORN_WORKER_CLASS picks how requests are served:
+  gthread (default)  queueblaze.wsgi on threaded workers; each worker runs
+                     GUNICORN_THREADS requests at once
+  uvicorn            queueblaze.asgi on uvicorn workers, which also turns on
+                     the batched async checkout writers (main/ingest.py)
+
+Workers default to one per CPU (plus one for gthread, whose threads spend
+most of their time waiting on the database); WEB_CONCURRENCY overrides it.
+Every worker holds its own database connections, so workers x threads must
+stay under the database's connection limit.
+
+Workers write their metrics to PROMETHEUS_MULTIPROC_DIR, which /metrics
+adds up (main/metrics.py); it is emptied whenever gunicorn starts.
+"""
+import os
+import shutil
+import tempfile
+
+
+def _cpu_count():
+    # CPUs this process may actually run on, not every core on the host
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+worker_model = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_model == 'uvicorn':
+    wsgi_app = 'queueblaze.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    default_workers = _cpu_count()
+elif worker_model == 'gthread':
+    wsgi_app = 'queueblaze.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+    default_workers = _cpu_count() + 1
+else:
+    raise RuntimeError(f'GUNICORN_WORKER_CLASS must be gthread or uvicorn, not {worker_model!r}')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY') or default_workers)
+
+# Import Django once in the master so workers share its memory and a broken
+# deploy fails before any worker starts
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Recycle workers to bound slow leaks; the jitter keeps them from all
+# restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Longer than the platform proxy's idle timeout would be pointless; shorter
+# than it means needless reconnects
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Heartbeat files on tmpfs, so a slow container disk can't get workers killed
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Set before the app is (pre)loaded, which is when prometheus_client reads it.
+# Files of a previous run would be counted again, so start empty.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'queueblaze-metrics'),
+)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+
+
+def pre_fork(server, worker):
+    # A connection opened while preloading must not be shared by the forked
+    # workers; the master never serves requests, so just close it
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
@@ -1,17 +1,44 @@
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import Q
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from .models import Product, SiteSettings, Order
+from . import api, catalog, dbstats, exports, ingest, metrics, product_io, ratelimit, rollups, search, storage, tiered_cache
+from .querystats import query_budget
+from asgiref.sync import sync_to_async
+from django.utils.http import http_date, quote_etag
+from django.utils.timezone import localdate
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+import hashlib
 import json
+import logging
+import os
 import re
 
+logger = logging.getLogger(__name__)
+
+# (requests, window in seconds) per client IP
+LOGIN_RATE_LIMIT = (10, 15 * 60)
+ORDER_RATE_LIMIT = (20, 60)
+INQUIRY_RATE_LIMIT = (3, 60 * 60)
+
+
+def _login_rate_limited(request):
+    messages.error(request, 'Too many login attempts. Please try again later.')
+    return render(request, 'admin/login.html', status=429)
+
 # Admin login
 @csrf_exempt
+@ratelimit.rate_limit('login', *LOGIN_RATE_LIMIT, limited_response=_login_rate_limited)
 def admin_login(request):
     if request.user.is_authenticated:
         return redirect('admin_dashboard')
@@ -33,45 +60,31 @@ def admin_logout(request):
     return redirect('admin_login')
 
 # Admin dashboard
+@query_budget(8)
 @login_required
 def admin_dashboard(request):
-    total_products = Product.objects.count()
-    active_products = Product.objects.filter(is_active=True).count()
-    total_orders = Order.objects.count()
-    pending_orders = Order.objects.filter(status='pending').count()
-    
-    recent_orders = Order.objects.all()[:5]
-    
-    context = {
-        'total_products': total_products,
-        'active_products': active_products,
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'recent_orders': recent_orders,
-    }
+    # Totals come from the daily sales rollups, cached for a few seconds
+    context = dict(rollups.dashboard_stats())
+    context['recent_orders'] = Order.objects.only(*ORDER_LIST_COLUMNS).order_by('-created_at', '-id')[:5]
     return render(request, 'admin/dashboard.html', context)
 
 # Products management
+@query_budget(5)
 @login_required
 def admin_products(request):
-    products = Product.objects.all()
+    products = Product.objects.defer('image')
     return render(request, 'admin/products.html', {'products': products})
 
+def _sku_taken(product):
+    return bool(product.sku) and Product.objects.filter(sku=product.sku).exclude(id=product.id).exists()
+
 # Add product
 @login_required
 def admin_product_add(request):
     if request.method == 'POST':
-        # Handle image upload and convert to base64
-        image_data = None
-        content_type = None
-        if request.FILES.get('image'):
-            import base64
-            img_file = request.FILES.get('image')
-            image_data = base64.b64encode(img_file.read()).decode('utf-8')
-            content_type = img_file.content_type
-        
         product = Product(
             name=request.POST.get('name'),
+            sku=request.POST.get('sku', '').strip(),
             category=request.POST.get('category'),
             strain=request.POST.get('strain'),
             thc=request.POST.get('thc'),
@@ -79,9 +92,12 @@ def admin_product_add(request):
             icon=request.POST.get('icon'),
             description=request.POST.get('description'),
             is_active=request.POST.get('is_active') == 'on',
-            image=image_data,
-            image_content_type=content_type
         )
+        if _sku_taken(product):
+            return render(request, 'admin/product_form.html', {'product': product, 'error': 'That SKU is already in use.'})
+        # Image bytes go to the blob store along with their resized variants
+        if request.FILES.get('image'):
+            product.set_image(request.FILES.get('image'))
         
         product.save()
         messages.success(request, 'Product added successfully!')
@@ -91,11 +107,12 @@ def admin_product_add(request):
 # Edit product
 @login_required
 def admin_product_edit(request, product_id):
-    product = Product.objects.get(id=product_id)
-    old_image = product.image
+    product = Product.objects.defer('image').get(id=product_id)
+    old_image_hash = product.image_hash
     
     if request.method == 'POST':
         product.name = request.POST.get('name')
+        product.sku = request.POST.get('sku', '').strip() or product.sku
         product.category = request.POST.get('category')
         product.strain = request.POST.get('strain')
         product.thc = request.POST.get('thc')
@@ -103,21 +120,21 @@ def admin_product_edit(request, product_id):
         product.icon = request.POST.get('icon')
         product.description = request.POST.get('description')
         product.is_active = request.POST.get('is_active') == 'on'
+        if _sku_taken(product):
+            return render(request, 'admin/product_form.html', {'product': product, 'error': 'That SKU is already in use.'})
         
-        # Handle image upload/remove - store as base64 in database
+        # Handle image upload/remove - store bytes in the blob store
         remove_image = request.POST.get('remove_image') == 'true'
         
         if remove_image:
-            product.image = None
-            product.image_content_type = None
+            product.clear_image()
         elif request.FILES.get('image'):
-            import base64
-            img_file = request.FILES.get('image')
-            product.image = base64.b64encode(img_file.read()).decode('utf-8')
-            product.image_content_type = img_file.content_type
+            product.set_image(request.FILES.get('image'))
         # Keep old image if no new upload and not removing
         
         product.save()
+        if old_image_hash != product.image_hash:
+            storage.release_image(old_image_hash)
         messages.success(request, 'Product updated successfully!')
         return redirect('admin_products')
     return render(request, 'admin/product_form.html', {'product': product})
@@ -125,21 +142,140 @@ def admin_product_edit(request, product_id):
 # Delete product
 @login_required
 def admin_product_delete(request, product_id):
-    product = Product.objects.get(id=product_id)
+    product = Product.objects.defer('image').get(id=product_id)
     product.delete()
     messages.success(request, 'Product deleted successfully!')
     return redirect('admin_products')
 
+# Bulk import products from a CSV/JSON catalog plus an optional zip of images
+@login_required
+def admin_product_import(request):
+    report = None
+    error = None
+    if request.method == 'POST':
+        upload = request.FILES.get('catalog')
+        try:
+            if not upload:
+                raise ValueError('Choose a catalog file to import')
+            rows = product_io.read_catalog(upload, upload.name)
+            images = product_io.ZipImages(request.FILES['images']) if request.FILES.get('images') else None
+        except ValueError as e:
+            error = str(e)
+        else:
+            report = product_io.import_products(rows, images)
+    return render(request, 'admin/product_import.html', {'report': report, 'error': error})
+
+# Export the catalog (without images) in the format the importer reads
+@login_required
+def admin_product_export(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'json'):
+        return HttpResponseBadRequest('Invalid format')
+    content_type = 'text/csv' if export_format == 'csv' else 'application/json'
+    response = HttpResponse(content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="products-{localdate().isoformat()}.{export_format}"'
+    product_io.write_catalog(response, export_format)
+    return response
+
+# Cache and database connection counters of the worker serving this request
+@login_required
+def admin_runtime_stats(request):
+    return JsonResponse({
+        'pid': os.getpid(),
+        'cache': tiered_cache.stats(),
+        'db_acquire': dbstats.acquire_stats(),
+        'db_pool': dbstats.pool_stats(),
+    })
+
 # Orders management
+ADMIN_ORDERS_PAGE_SIZE = 50
+ORDER_LIST_COLUMNS = (
+    'id', 'first_name', 'last_name', 'customer_email', 'customer_phone',
+    'payment_method', 'total_amount', 'status', 'created_at',
+)
+
+
+@query_budget(5)
 @login_required
 def admin_orders(request):
-    orders = Order.objects.all()
-    return render(request, 'admin/orders.html', {'orders': orders})
+    filters = {
+        'status': request.GET.get('status', ''),
+        'payment_method': request.GET.get('payment_method', ''),
+        'date_from': request.GET.get('date_from', ''),
+        'date_to': request.GET.get('date_to', ''),
+    }
+    error = None
+    try:
+        orders = exports.filter_orders(Order.objects.all(), **filters)
+    except ValueError as e:
+        error = str(e)
+        orders = Order.objects.all()
+    
+    # Keyset pagination on (created_at, id): "before" pages towards older orders,
+    # "after" back towards newer ones, so every page is an index range scan
+    before = request.GET.get('before')
+    after = request.GET.get('after')
+    try:
+        if after:
+            created_at, order_id = api.decode_cursor(after)
+            orders = orders.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=order_id)
+            ).order_by('created_at', 'id')
+        elif before:
+            created_at, order_id = api.decode_cursor(before)
+            orders = orders.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+            ).order_by('-created_at', '-id')
+        else:
+            orders = orders.order_by('-created_at', '-id')
+    except ValueError:
+        error = error or 'Invalid page'
+        after = before = None
+        orders = orders.order_by('-created_at', '-id')
+    
+    page = list(orders.only(*ORDER_LIST_COLUMNS)[:ADMIN_ORDERS_PAGE_SIZE + 1])
+    has_more = len(page) > ADMIN_ORDERS_PAGE_SIZE
+    page = page[:ADMIN_ORDERS_PAGE_SIZE]
+    if after:
+        page.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = bool(before), has_more
+    
+    query = urlencode({k: v for k, v in filters.items() if v})
+    prefix = f'?{query}&' if query else '?'
+    export_url = reverse('admin_orders_export') + prefix
+    return render(request, 'admin/orders.html', {
+        'orders': page,
+        'filters': filters,
+        'filter_error': error,
+        'is_filtered': any(filters.values()),
+        'status_choices': Order.STATUS_CHOICES,
+        'payment_method_choices': Order.PAYMENT_METHOD_CHOICES,
+        'newer_url': f'{prefix}after={api.encode_cursor(page[0])}' if page and has_newer else None,
+        'older_url': f'{prefix}before={api.encode_cursor(page[-1])}' if page and has_older else None,
+        'csv_export_url': f'{export_url}format=csv',
+        'ndjson_export_url': f'{export_url}format=ndjson',
+    })
+
+# Export orders (CSV or NDJSON), streamed with the same filters as the list
+@login_required
+def admin_orders_export(request):
+    export_format = request.GET.get('format', 'csv')
+    filters = {name: request.GET.get(name, '') for name in ('status', 'payment_method', 'date_from', 'date_to')}
+    try:
+        rows = exports.iter_export(export_format, filters)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    response = StreamingHttpResponse(rows, content_type=exports.FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="orders-{localdate().isoformat()}.{export_format}"'
+    return response
 
 # Order detail
+@query_budget(6)
 @login_required
 def admin_order_detail(request, order_id):
-    order = Order.objects.get(id=order_id)
+    order = Order.objects.prefetch_related('items').get(id=order_id)
     if request.method == 'POST':
         order.status = request.POST.get('status')
         order.notes = request.POST.get('notes')
@@ -185,24 +321,121 @@ def admin_settings(request):
     return render(request, 'admin/settings.html', {'settings': settings})
 
 # API for products (for frontend)
+def _requested_int(request, name, default, minimum=0, maximum=None):
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        raise ValueError(f'Invalid {name}')
+    if value < minimum:
+        raise ValueError(f'Invalid {name}')
+    return min(value, maximum) if maximum is not None else value
+
+
+def _catalog_etag(request, version=None):
+    return f'catalog-{version or catalog.get_version()}'
+
+
+def _catalog_last_modified(request, version=None):
+    # Catalog versions are microsecond timestamps of the last change
+    return datetime.fromtimestamp((version or catalog.get_version()) / 1_000_000, tz=timezone.utc)
+
+
+def _catalog_response(request, version, data):
+    """JSON for a catalog ``get_or_build`` result, validated by the version it was built for.
+
+    @condition answers 304 for clients that already hold the current
+    version; a previous version served during a rebuild gets its own
+    ETag so it isn't cached as the current one.
+    """
+    response = JsonResponse(data)
+    response['ETag'] = quote_etag(_catalog_etag(request, version))
+    response['Last-Modified'] = http_date(_catalog_last_modified(request, version).timestamp())
+    return response
+
+
+@query_budget(4)
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)
 def api_products(request):
-    products = Product.objects.filter(is_active=True)
-    data = [{
-        'id': p.id,
-        'name': p.name,
-        'category': p.category,
-        'strain': p.strain,
-        'thc': p.thc,
-        'price': str(p.price),
-        'icon': p.icon,
-        'image': p.image_url,  # Returns data URL for database-stored images
-        'description': p.description
-    } for p in products]
-    return JsonResponse(data, safe=False)
+    try:
+        fields = api.requested_fields(request)
+        limit = _requested_int(request, 'limit', api.PAGE_SIZE, minimum=1, maximum=api.MAX_PAGE_SIZE)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            created_at, product_id = api.decode_cursor(cursor)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+
+    def build_page():
+        products = (
+            Product.objects.filter(is_active=True)
+            .only(*api.field_columns(fields))
+            .order_by('-created_at', '-id')
+        )
+        # Keyset pagination: the cursor is the (created_at, id) of the last row served
+        if cursor:
+            products = products.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=product_id)
+            )
+        page = list(products[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            'results': [{f: api.product_field_value(p, f) for f in fields} for p in page],
+            'next_cursor': api.encode_cursor(page[-1]) if has_more else None,
+        }
+
+    cache_name = f"api_products:{','.join(fields)}:{limit}:{cursor or ''}"
+    return _catalog_response(request, *catalog.get_or_build(cache_name, build_page))
+
+# Product search with category/strain/price facets
+@query_budget(8)
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)
+def api_product_search(request):
+    text = request.GET.get('q', '')[:100]
+    category = request.GET.get('category') or None
+    strain = request.GET.get('strain') or None
+    try:
+        fields = api.requested_fields(request)
+        limit = _requested_int(request, 'limit', search.DEFAULT_LIMIT, minimum=1, maximum=api.MAX_PAGE_SIZE)
+        offset = _requested_int(request, 'offset', 0)
+        min_price, max_price = search.price_bounds(
+            request.GET.get('price'), request.GET.get('min_price'), request.GET.get('max_price')
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if category and category not in dict(Product.CATEGORY_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Invalid category'}, status=400)
+    if strain and strain not in dict(Product.STRAIN_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Invalid strain'}, status=400)
+
+    def build_results():
+        found = search.search_products(
+            text, category=category, strain=strain, min_price=min_price, max_price=max_price,
+            limit=limit, offset=offset, only=api.field_columns(fields),
+        )
+        return {
+            'total': found['total'],
+            'results': [{f: api.product_field_value(p, f) for f in fields} for p in found['products']],
+            'facets': found['facets'],
+        }
+
+    # Hashed, so the visitor's text can't make an invalid or overlong cache key
+    text_key = hashlib.sha1(text.strip().lower().encode()).hexdigest()
+    cache_name = (
+        f"search:{text_key}:{category}:{strain}:{min_price}:{max_price}:"
+        f"{','.join(fields)}:{limit}:{offset}"
+    )
+    return _catalog_response(request, *catalog.get_or_build(cache_name, build_results))
 
 # API for site settings
 def api_settings(request):
-    settings, created = SiteSettings.objects.get_or_create(id=1)
+    settings = SiteSettings.load()
     data = {
         'site_name': settings.site_name,
         'site_description': settings.site_description,
@@ -230,143 +463,173 @@ def create_admin():
         User.objects.create_superuser('admin', 'admin@queueblaze.co.za', 'admin123')
         print('Admin user created: admin / admin123')
 
+# Build an unsaved order from the checkout payload.
+# Raises ValueError with a customer-facing message when the cart is rejected.
+def _order_from_checkout(data, idempotency_key):
+    customer = data.get('customer', {}) or {}
+    address = data.get('address', {}) or {}
+    
+    # Line items are stored as OrderItem rows; items_json is kept as the raw record
+    items = data.get('items', []) or []
+    
+    order = Order(
+        first_name=customer.get('first_name', ''),
+        last_name=customer.get('last_name', ''),
+        customer_email=customer.get('email', ''),
+        customer_phone=customer.get('phone', ''),
+        
+        delivery_type=data.get('delivery_type', 'delivery'),
+        shipping_option=data.get('shipping_option') or 'standard',
+        
+        address_street=address.get('street', ''),
+        address_suburb=address.get('suburb', ''),
+        address_city=address.get('city', ''),
+        address_province=address.get('province', ''),
+        address_postal_code=address.get('postal_code', ''),
+        
+        payment_method=data.get('payment_method', 'eft'),
+        
+        items_json=json.dumps(items),
+        
+        notes=data.get('notes', ''),
+        status='pending',
+        idempotency_key=idempotency_key,
+    )
+    # Prices and totals come from the catalog, not from the browser
+    rows = order.build_items(items)
+    if not rows:
+        raise ValueError('Your cart is empty')
+    order.apply_totals(rows)
+    return order, rows
+
+
+def _idempotency_key(request, data):
+    # Retried submissions carry the same key and get the original order back
+    return (request.headers.get('Idempotency-Key') or data.get('idempotency_key') or '')[:64] or None
+
+
+def _order_response(order_id, order=None, duplicate=False):
+    data = {'success': True, 'order_id': order_id}
+    if duplicate:
+        data['duplicate'] = True
+    elif order is not None:
+        data.update(subtotal=str(order.subtotal), shipping=str(order.shipping), total=str(order.total_amount))
+    return JsonResponse(data)
+
+
 # Save order from checkout
 @csrf_exempt
+@ratelimit.rate_limit('order', *ORDER_RATE_LIMIT)
 def save_order(request):
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
+            idempotency_key = _idempotency_key(request, data)
+            if idempotency_key:
+                existing_id = Order.objects.filter(idempotency_key=idempotency_key).values_list('id', flat=True).first()
+                if existing_id:
+                    return _order_response(existing_id, duplicate=True)
             
-            # Debug: print the received data
-            print("Received order data:", data)
-            
-            # Extract customer data
-            customer = data.get('customer', {})
-            
-            # Extract address data
-            address = data.get('address', {}) or {}
-            
-            # Convert items to JSON string
-            items_json = json.dumps(data.get('items', []))
-            
-            order = Order(
-                first_name=customer.get('first_name', ''),
-                last_name=customer.get('last_name', ''),
-                customer_email=customer.get('email', ''),
-                customer_phone=customer.get('phone', ''),
-                
-                delivery_type=data.get('delivery_type', 'delivery'),
-                shipping_option=data.get('shipping_option') or 'standard',
-                
-                address_street=address.get('street', ''),
-                address_suburb=address.get('suburb', ''),
-                address_city=address.get('city', ''),
-                address_province=address.get('province', ''),
-                address_postal_code=address.get('postal_code', ''),
-                
-                payment_method=data.get('payment_method', 'eft'),
-                
-                items_json=items_json,
-                subtotal=data.get('subtotal', 0),
-                shipping=data.get('shipping', 0),
-                total_amount=data.get('total', 0),
-                
-                notes=data.get('notes', ''),
-                status='pending'
-            )
-            order.save()
-            return JsonResponse({'success': True, 'order_id': order.id})
+            order, rows = _order_from_checkout(data, idempotency_key)
+            try:
+                order.save_with_items(rows)
+            except IntegrityError:
+                # A concurrent retry with the same key won the insert
+                existing_id = Order.objects.filter(idempotency_key=idempotency_key).values_list('id', flat=True).first()
+                if not idempotency_key or not existing_id:
+                    raise
+                return _order_response(existing_id, duplicate=True)
+            metrics.ORDERS_CREATED.labels(order.payment_method).inc()
+            return _order_response(order.id, order)
         except json.JSONDecodeError as e:
-            print("JSON Decode Error:", str(e))
             return JsonResponse({'success': False, 'error': 'Invalid JSON: ' + str(e)}, status=400)
+        except ValueError as e:
+            # Cart rejected by pricing (unknown product, bad quantity)
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
         except Exception as e:
-            print("Order Save Error:", str(e))
-            import traceback
-            traceback.print_exc()
+            logger.exception('Order save failed')
             return JsonResponse({'success': False, 'error': str(e)}, status=400)
     return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
 
+# Async checkout for the ASGI app: validate, hand the order to the batched
+# writer (main/ingest.py) and answer once its batch is committed
+@csrf_exempt
+@ratelimit.rate_limit('order', *ORDER_RATE_LIMIT)
+async def save_order_async(request):
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            order, rows = await sync_to_async(_order_from_checkout)(data, _idempotency_key(request, data))
+            order_id, duplicate = await ingest.orders.submit((order, rows))
+            if not duplicate:
+                metrics.ORDERS_CREATED.labels(order.payment_method).inc()
+            return _order_response(order_id, order, duplicate)
+        except json.JSONDecodeError as e:
+            return JsonResponse({'success': False, 'error': 'Invalid JSON: ' + str(e)}, status=400)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        except Exception as e:
+            logger.exception('Order save failed')
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
+
+# Validate an inquiry payload and build its unsaved Order.
+# Returns None for honeypot hits; raises ValueError for invalid input.
+def _order_from_inquiry(data):
+    # Validate required fields
+    name = data.get('name', '').strip()
+    email = data.get('email', '').strip()
+    
+    if not name or not email:
+        raise ValueError('Name and email are required.')
+    
+    # Validate email format
+    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    
+    if not re.match(email_pattern, email):
+        raise ValueError('Invalid email format.')
+    
+    # Validate name length (prevent spam)
+    if len(name) > 100:
+        raise ValueError('Name too long.')
+    
+    # Get other fields with limits
+    phone = data.get('phone', '')[:20]
+    subject = data.get('subject', 'General')[:100]
+    message = data.get('message', '')[:2000]
+    
+    # Honeypot check (hidden field - should be empty)
+    if data.get('website', ''):
+        return None
+    
+    # Create order with inquiry details
+    return Order(
+        first_name=name.split()[0] if name else '',
+        last_name=' '.join(name.split()[1:]) if name and len(name.split()) > 1 else '',
+        customer_email=email,
+        customer_phone=phone,
+        delivery_type='pickup',
+        payment_method='eft',
+        items_json='[]',
+        subtotal=0,
+        shipping=0,
+        total_amount=0,
+        notes=f"Contact Inquiry - Subject: {subject}\n\nMessage: {message}",
+        status='pending'
+    )
+
 # Save contact inquiry with rate limiting and spam protection
 @csrf_exempt
+@ratelimit.rate_limit('inquiry', *INQUIRY_RATE_LIMIT)
 def save_inquiry(request):
     if request.method == 'POST':
         try:
-            # Get client IP for rate limiting
-            x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-            if x_forwarded_for:
-                ip = x_forwarded_for.split(',')[0]
-            else:
-                ip = request.META.get('REMOTE_ADDR', 'unknown')
-            
-            # Rate limiting: Max 3 submissions per hour per IP
-            rate_limit_key = f'rate_limit_inquiry_{ip}'
-            submissions = cache.get(rate_limit_key, 0)
-            
-            if submissions >= 3:
-                return JsonResponse({
-                    'success': False, 
-                    'error': 'Too many requests. Please try again later.'
-                }, status=429)
-            
-            data = json.loads(request.body)
-            
-            # Validate required fields
-            name = data.get('name', '').strip()
-            email = data.get('email', '').strip()
-            
-            if not name or not email:
-                return JsonResponse({
-                    'success': False, 
-                    'error': 'Name and email are required.'
-                }, status=400)
-            
-            # Validate email format
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            
-            if not re.match(email_pattern, email):
-                return JsonResponse({
-                    'success': False, 
-                    'error': 'Invalid email format.'
-                }, status=400)
-            
-            # Validate name length (prevent spam)
-            if len(name) > 100:
-                return JsonResponse({
-                    'success': False, 
-                    'error': 'Name too long.'
-                }, status=400)
-            
-            # Get other fields with limits
-            phone = data.get('phone', '')[:20]
-            subject = data.get('subject', 'General')[:100]
-            message = data.get('message', '')[:2000]
-            
-            # Honeypot check (hidden field - should be empty)
-            honeypot = data.get('website', '')
-            if honeypot:
-                # Don't reveal we caught them, just silently succeed
+            order = _order_from_inquiry(json.loads(request.body))
+            if order is None:
+                # Honeypot: don't reveal we caught them, just silently succeed
                 return JsonResponse({'success': True})
-            
-            # Create order with inquiry details
-            order = Order(
-                first_name=name.split()[0] if name else '',
-                last_name=' '.join(name.split()[1:]) if name and len(name.split()) > 1 else '',
-                customer_email=email,
-                customer_phone=phone,
-                delivery_type='pickup',
-                payment_method='eft',
-                items_json='[]',
-                subtotal=0,
-                shipping=0,
-                total_amount=0,
-                notes=f"Contact Inquiry - Subject: {subject}\n\nMessage: {message}",
-                status='pending'
-            )
             order.save()
-            
-            # Increment rate limit counter
-            cache.set(rate_limit_key, submissions + 1, 3600)
-            
+            metrics.INQUIRIES_CREATED.inc()
             return JsonResponse({'success': True})
         except json.JSONDecodeError:
             return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
@@ -374,3 +637,20 @@ def save_inquiry(request):
             return JsonResponse({'success': False, 'error': str(e)}, status=400)
     return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
 
+# Async contact inquiry for the ASGI app, written through the batched writer
+@csrf_exempt
+@ratelimit.rate_limit('inquiry', *INQUIRY_RATE_LIMIT)
+async def save_inquiry_async(request):
+    if request.method == 'POST':
+        try:
+            order = _order_from_inquiry(json.loads(request.body))
+            if order is None:
+                return JsonResponse({'success': True})
+            await ingest.inquiries.submit(order)
+            metrics.INQUIRIES_CREATED.inc()
+            return JsonResponse({'success': True})
+        except json.JSONDecodeError:
+            return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
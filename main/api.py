@@ -0,0 +1,73 @@
+"""
+Product fields and keyset cursors of the JSON APIs.
+
+Shared by the API views (main/admin.py), the home page, which hands its
+last product to /api/products/ as a cursor (main/views.py), and the
+static export's catalog snapshot (main/prerender.py).
+
+A cursor encodes the (created_at, id) of the last row of a page, so the
+next page is an index range scan however deep it is.
+"""
+import base64
+from datetime import datetime
+
+# Field name -> model columns it needs, so .only() never loads unused columns
+PRODUCT_FIELDS = {
+    'id': ['id'],
+    'name': ['name'],
+    'category': ['category'],
+    'strain': ['strain'],
+    'thc': ['thc'],
+    'price': ['price'],
+    'icon': ['icon'],
+    'image': ['image_hash', 'image_content_type'],
+    'thumb': ['image_hash', 'image_content_type', 'image_variants'],
+    'card': ['image_hash', 'image_variants'],  # <source> type/srcset pairs, as on the home page
+    'description': ['description'],
+}
+DEFAULT_FIELDS = ['id', 'name', 'category', 'strain', 'thc', 'price', 'icon', 'image', 'description']
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def product_field_value(product, field):
+    if field == 'price':
+        return str(product.price)
+    if field == 'image':
+        return product.image_url  # Blob store URL, cacheable by the browser
+    if field == 'thumb':
+        return product.thumb_url
+    if field == 'card':
+        return product.card_sources
+    return getattr(product, field)
+
+
+def requested_fields(request):
+    # Field selection: ?fields=id,name,price or ?exclude=image,description
+    if request.GET.get('fields'):
+        fields = [f for f in request.GET['fields'].split(',') if f]
+    else:
+        fields = list(DEFAULT_FIELDS)
+    excluded = [f for f in request.GET.get('exclude', '').split(',') if f]
+    unknown = [f for f in fields + excluded if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise ValueError('Unknown fields: ' + ', '.join(unknown))
+    return [f for f in fields if f not in excluded]
+
+
+def field_columns(fields):
+    columns = {'id', 'created_at'}
+    for f in fields:
+        columns.update(PRODUCT_FIELDS[f])
+    return columns
+
+
+def encode_cursor(obj):
+    raw = f'{obj.created_at.isoformat()}|{obj.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    created_at, obj_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), int(obj_id)
@@ -0,0 +1,232 @@
+"""
+Front-end asset build: minified bundles, critical CSS and the static
+files storage that fingerprints and precompresses them.
+
+BUNDLES maps each bundle to its source files under static/. build()
+minifies and concatenates them into ASSET_BUILD_DIR, one of
+STATICFILES_DIRS, so collectstatic then fingerprints them and writes
+.gz and .br copies alongside (StaticFilesStorage below; Brotli needs the
+brotli package). It also extracts the critical CSS - the rules the top
+of the home page needs for its first paint - which home.html inlines
+with {% critical_css %} while the full stylesheet loads without blocking
+rendering. Other pages link the stylesheet as usual.
+
+With DEBUG on, or before the build has run, the {% bundle %} tag links
+the source files instead, so editing static/ needs no rebuild locally.
+"""
+import gzip
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import get_template
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+BUNDLES = {
+    'css/site.min.css': ['css/styles.css'],
+    'js/site.min.js': ['js/main.js'],
+}
+CRITICAL_CSS = 'critical.css'
+CRITICAL_SOURCE = 'css/site.min.css'
+# Templates rendered above the fold, each read up to its critical marker
+CRITICAL_TEMPLATES = ['base.html', 'home.html']
+CRITICAL_MARKER = '{# critical:end #}'
+# Classes main.js adds before the first paint (theme, age gate, restored scroll)
+CRITICAL_EXTRA_CLASSES = {'light-theme', 'active', 'scrolled'}
+# Roughly what fits in the first round trip with the HTML itself
+CRITICAL_BUDGET = 14 * 1024
+# Selectors for states no first paint can be in
+INTERACTIVE_PSEUDO = re.compile(r':(?:hover|focus|focus-within|focus-visible|active|visited|checked)\b')
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """WhiteNoise's fingerprinting, compressing storage, lenient about uncollected files.
+
+    Names missing from the manifest (tests, or DEBUG off before
+    collectstatic has run) are served unhashed instead of raising.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+def build_dir():
+    return Path(settings.ASSET_BUILD_DIR)
+
+
+def _minify(name, text):
+    if name.endswith('.css'):
+        from rcssmin import cssmin
+        return cssmin(text)
+    from rjsmin import jsmin
+    return jsmin(text)
+
+
+def _brotli_size(data):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return len(brotli.compress(data))
+
+
+def _sizes(data):
+    return {'bytes': len(data), 'gzip': len(gzip.compress(data, 9)), 'brotli': _brotli_size(data)}
+
+
+# --- Critical CSS ---
+
+def _skip_string(css, i):
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def _blocks(css):
+    """Top-level ``(prelude, body)`` pairs; ``body`` is None for statements like @import."""
+    blocks = []
+    i = 0
+    while i < len(css):
+        start = i
+        while i < len(css) and css[i] not in '{;':
+            i = _skip_string(css, i) if css[i] in '"\'' else i + 1
+        if i >= len(css):
+            break
+        if css[i] == ';':
+            blocks.append((css[start:i].strip(), None))
+            i += 1
+            continue
+        body_start = i + 1
+        depth = 1
+        i += 1
+        while i < len(css) and depth:
+            if css[i] in '"\'':
+                i = _skip_string(css, i)
+                continue
+            depth += {'{': 1, '}': -1}.get(css[i], 0)
+            i += 1
+        blocks.append((css[start:body_start - 1].strip(), css[body_start:i - 1]))
+    return blocks
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and not depth:
+            selectors.append(prelude[start:i].strip())
+            start = i + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+def _selector_used(selector, used):
+    if INTERACTIVE_PSEUDO.search(selector):
+        return False
+    # Only the element, class and id parts decide whether it can match
+    simple = re.sub(r':[\w-]+\([^)]*\)|::?[\w-]+|\[[^\]]*\]', '', selector)
+    return (
+        all(name in used['classes'] for name in re.findall(r'\.([\w-]+)', simple))
+        and all(name in used['ids'] for name in re.findall(r'#([\w-]+)', simple))
+        and all(name.lower() in used['tags'] for name in re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', simple))
+    )
+
+
+def _critical_rules(css, used, keyframes):
+    kept = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            continue
+        if prelude.startswith(('@media', '@supports')):
+            inner = _critical_rules(body, used, keyframes)
+            if inner:
+                kept.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@font-face'):
+            kept.append(f'{prelude}{{{body}}}')
+        elif re.match(r'@(?:-\w+-)?keyframes', prelude):
+            keyframes[prelude.split()[-1]] = f'{prelude}{{{body}}}'
+        elif not prelude.startswith('@'):
+            selectors = [s for s in _split_selectors(prelude) if _selector_used(s, used)]
+            if selectors:
+                kept.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(kept)
+
+
+def used_selectors():
+    """Classes, ids and tags in the above-the-fold part of CRITICAL_TEMPLATES."""
+    used = {'classes': set(CRITICAL_EXTRA_CLASSES), 'ids': set(), 'tags': {'html', 'body'}}
+    for name in CRITICAL_TEMPLATES:
+        source = get_template(name).template.source.split(CRITICAL_MARKER)[0]
+        # Template tags can't be resolved here; drop them and keep the literal names
+        source = re.sub(r'{%.*?%}|{{.*?}}', ' ', source)
+        for value in re.findall(r'\bclass="([^"]*)"', source):
+            used['classes'].update(value.split())
+        used['ids'].update(re.findall(r'\bid="([^"\s]+)"', source))
+        used['tags'].update(tag.lower() for tag in re.findall(r'<([a-zA-Z][\w-]*)', source))
+    return used
+
+
+def critical_css(css):
+    """The rules of ``css`` that can apply to the top of the home page."""
+    keyframes = {}
+    kept = _critical_rules(css, used_selectors(), keyframes)
+    # Animations the kept rules run
+    kept += ''.join(rule for name, rule in keyframes.items() if re.search(rf'\b{re.escape(name)}\b', kept))
+    return kept
+
+
+# --- Build ---
+
+def build():
+    """Write the bundles and critical CSS; returns ``{output: {'source': sizes, 'built': sizes}}``."""
+    out_dir = build_dir()
+    report = {}
+    for bundle, sources in BUNDLES.items():
+        texts = []
+        for source in sources:
+            path = finders.find(source)
+            if path is None:
+                raise ValueError(f'Bundle {bundle}: source {source} not found in the static directories')
+            texts.append(Path(path).read_text(encoding='utf-8'))
+        original = '\n'.join(texts)
+        minified = '\n'.join(_minify(bundle, text) for text in texts)
+        target = out_dir / bundle
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(minified, encoding='utf-8')
+        report[bundle] = {'source': _sizes(original.encode()), 'built': _sizes(minified.encode())}
+
+    critical = critical_css((out_dir / CRITICAL_SOURCE).read_text(encoding='utf-8'))
+    (out_dir / CRITICAL_CSS).write_text(critical, encoding='utf-8')
+    report[CRITICAL_CSS] = {'source': None, 'built': _sizes(critical.encode())}
+    _built.clear()
+    return report
+
+
+# --- Template helpers (main/templatetags/assets.py) ---
+
+_built = {}
+
+
+def use_bundles():
+    """Whether pages should link the built bundles rather than their sources."""
+    if settings.DEBUG:
+        return False
+    if 'exists' not in _built:
+        _built['exists'] = (build_dir() / CRITICAL_SOURCE).exists()
+    return _built['exists']
+
+
+def inline_critical_css():
+    """The built critical CSS, or '' when bundles aren't in use."""
+    if not use_bundles():
+        return ''
+    if 'critical' not in _built:
+        path = build_dir() / CRITICAL_CSS
+        _built['critical'] = path.read_text(encoding='utf-8') if path.exists() else ''
+    return _built['critical']
@@ -0,0 +1,295 @@
+"""
+Benchmarks of the main views.
+
+Each scenario requests one view: the storefront (home), the catalog API,
+checkout (save_order) and the admin order list. run_client() sends them
+through the Django test client in this process, one at a time, which
+isolates the cost of the view itself; run_http() drives a running server
+(gunicorn) over concurrent keep-alive connections, which adds the
+server, the network stack and contention between workers.
+
+Per scenario it reports throughput, p50/p95/p99/max latency, errors,
+queries per request (from the Server-Timing header added by
+main/middleware.py) and, with the test client, the peak Python memory a
+single request allocates. results() adds the environment - database
+vendor and version, data size, Python, Django, git commit - so runs
+saved as JSON can be compared with compare().
+
+Checkout writes real orders. Every request comes from a different client
+address so the rate limits don't turn the run into a stream of 429s.
+"""
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from . import catalog
+from .models import Order, Product
+
+Scenario = namedtuple('Scenario', ['name', 'method', 'path', 'body', 'admin'])
+
+SCENARIO_NAMES = ['home', 'api_products', 'save_order', 'admin_orders', 'admin_orders_filtered']
+# Requests per scenario measured under tracemalloc, which is too slow for the timed ones
+MEMORY_SAMPLES = 5
+BENCHMARK_USER = 'benchmark'
+
+
+def scenarios(names=None):
+    product_ids = sorted(catalog.order_products())
+    rng = random.Random(0)
+
+    def order_body():
+        if not product_ids:
+            raise ValueError('save_order needs active products; run seed_data first')
+        items = [{'id': product_id, 'quantity': rng.randint(1, 3)}
+                 for product_id in rng.sample(product_ids, k=min(3, len(product_ids)))]
+        return json.dumps({
+            'customer': {'first_name': 'Bench', 'last_name': 'Mark', 'email': 'bench@example.test', 'phone': '0820000000'},
+            'address': {'street': '1 Main Road', 'city': 'Cape Town', 'province': 'Western Cape', 'postal_code': '8001'},
+            'delivery_type': 'delivery',
+            'shipping_option': 'standard',
+            'payment_method': 'eft',
+            'items': items,
+        })
+
+    available = {
+        'home': Scenario('home', 'GET', reverse('home'), None, False),
+        'api_products': Scenario('api_products', 'GET', reverse('api_products'), None, False),
+        'save_order': Scenario('save_order', 'POST', reverse('save_order'), order_body, False),
+        'admin_orders': Scenario('admin_orders', 'GET', reverse('admin_orders'), None, True),
+        'admin_orders_filtered': Scenario(
+            'admin_orders_filtered', 'GET', reverse('admin_orders') + '?status=pending&payment_method=eft', None, True,
+        ),
+    }
+    return [available[name] for name in names or SCENARIO_NAMES]
+
+
+def _client_address(n):
+    # TEST-NET style benchmark range (198.18.0.0/15): one address per request
+    return f'198.{18 + n // 65536 % 2}.{n // 256 % 256}.{n % 256}'
+
+
+def _queries(server_timing):
+    # 'db;desc="12 queries";dur=3.4, total;dur=9.1'
+    if server_timing and 'db;desc="' in server_timing:
+        return int(server_timing.split('db;desc="', 1)[1].split(' ', 1)[0])
+    return None
+
+
+def _percentile(ordered, percent):
+    # Nearest rank
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, elapsed, errors, queries, peak_memory=None):
+    """Numbers for one scenario; ``latencies`` in seconds, ``queries`` per request (None if unknown)."""
+    ordered = sorted(latencies)
+    known = [q for q in queries if q is not None]
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput': len(ordered) / elapsed if elapsed else None,
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': _percentile(ordered, 50) * 1000,
+        'p95_ms': _percentile(ordered, 95) * 1000,
+        'p99_ms': _percentile(ordered, 99) * 1000,
+        'max_ms': ordered[-1] * 1000,
+        'queries_mean': sum(known) / len(known) if known else None,
+        'queries_max': max(known) if known else None,
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def benchmark_user():
+    user = User.objects.filter(username=BENCHMARK_USER).first()
+    if user is None:
+        user = User.objects.create_user(BENCHMARK_USER, is_staff=True, is_superuser=True)
+        user.set_unusable_password()
+        user.save()
+    return user
+
+
+# --- Test client ---
+
+def _client_request(client, scenario, n):
+    kwargs = {'REMOTE_ADDR': _client_address(n)}
+    if scenario.method == 'POST':
+        return client.post(scenario.path, scenario.body(), content_type='application/json', **kwargs)
+    return client.get(scenario.path, **kwargs)
+
+
+def run_client(selected, requests=200, warmup=10):
+    """Run each scenario sequentially in this process; returns ``{name: summary}``."""
+    client = Client()
+    if any(scenario.admin for scenario in selected):
+        client.force_login(benchmark_user())
+    results = {}
+    counter = 0
+    # Record every request's queries; let the test client's host through
+    with override_settings(QUERY_STATS_SAMPLE_RATE=1.0, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for scenario in selected:
+            for _ in range(warmup):
+                _client_request(client, scenario, counter)
+                counter += 1
+
+            latencies, queries, errors = [], [], 0
+            started = time.perf_counter()
+            for _ in range(requests):
+                request_started = time.perf_counter()
+                response = _client_request(client, scenario, counter)
+                latencies.append(time.perf_counter() - request_started)
+                counter += 1
+                errors += response.status_code >= 400
+                queries.append(_queries(response.get('Server-Timing')))
+            elapsed = time.perf_counter() - started
+
+            peak = 0
+            tracemalloc.start()
+            try:
+                for _ in range(MEMORY_SAMPLES):
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+                    _client_request(client, scenario, counter)
+                    counter += 1
+                    peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+            finally:
+                tracemalloc.stop()
+            results[scenario.name] = summarize(latencies, elapsed, errors, queries, peak)
+    return results
+
+
+# --- HTTP driver ---
+
+def _session_cookie(user):
+    # A logged-in session in the database the server shares with us
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def _http_worker(url, scenario, numbers, bodies, cookie):
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    conn = connection_class(url.hostname, url.port, timeout=30)
+    samples = []
+    for n in numbers:
+        headers = {'X-Forwarded-For': _client_address(n), 'Host': url.netloc}
+        if cookie:
+            headers['Cookie'] = cookie
+        body = bodies.get(n)
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        try:
+            conn.request(scenario.method, url.path.rstrip('/') + scenario.path, body, headers)
+            response = conn.getresponse()
+            response.read()
+            status, server_timing = response.status, response.getheader('Server-Timing')
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            status, server_timing = None, None
+        samples.append((time.perf_counter() - started, status, _queries(server_timing)))
+    conn.close()
+    return samples
+
+
+def run_http(base_url, selected, requests=200, warmup=10, concurrency=8):
+    """Drive a running server with ``concurrency`` connections per scenario; returns ``{name: summary}``.
+
+    The server must use this database (for the admin session) and should
+    run with QUERY_STATS_SAMPLE_RATE=1 for query counts.
+    """
+    url = urlsplit(base_url)
+    cookie = _session_cookie(benchmark_user()) if any(scenario.admin for scenario in selected) else None
+    results = {}
+    counter = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for scenario in selected:
+            total = warmup + requests
+            numbers = range(counter, counter + total)
+            counter += total
+            bodies = {n: scenario.body() for n in numbers} if scenario.body else {}
+            warm, timed = numbers[:warmup], numbers[warmup:]
+            list(pool.map(lambda share: _http_worker(url, scenario, share, bodies, cookie),
+                          [warm[i::concurrency] for i in range(concurrency)]))
+
+            started = time.perf_counter()
+            shares = pool.map(lambda share: _http_worker(url, scenario, share, bodies, cookie),
+                              [timed[i::concurrency] for i in range(concurrency)])
+            samples = [sample for share in shares for sample in share]
+            elapsed = time.perf_counter() - started
+            results[scenario.name] = summarize(
+                [latency for latency, _, _ in samples], elapsed,
+                sum(1 for _, status, _ in samples if status is None or status >= 400),
+                [queries for _, _, queries in samples],
+            )
+    return results
+
+
+# --- Results ---
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'database': connection.vendor,
+        'database_version': '.'.join(str(part) for part in connection.get_database_version()),
+        'products': Product.objects.count(),
+        'orders': Order.objects.count(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'cpu_count': os.cpu_count(),
+        'commit': _git_commit(),
+    }
+
+
+def results(mode, scenario_results, **options):
+    return {
+        'mode': mode,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': environment(),
+        'options': options,
+        'scenarios': scenario_results,
+    }
+
+
+def compare(previous, current):
+    """``[(scenario, metric, before, after, change %)]`` for throughput, p95 and queries."""
+    rows = []
+    for name, after in current['scenarios'].items():
+        before = previous['scenarios'].get(name)
+        if before is None:
+            continue
+        for metric in ('throughput', 'p95_ms', 'queries_mean'):
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            rows.append((name, metric, old, new, (new - old) / old * 100 if old else None))
+    return rows
@@ -0,0 +1,126 @@
+"""
+Versioned catalog cache.
+
+Everything derived from the product catalog is cached under the current
+catalog version, which is bumped whenever a Product is saved or deleted
+(see main/signals.py). Old entries are never invalidated one by one; they
+simply stop being read and expire on their own.
+
+When a version bump makes an entry miss, only one worker rebuilds it (a
+short cache lock); the others keep serving the previous value until the
+new one is in place. get_or_build() returns the version alongside the
+value, so anything derived from it (ETags, fragment cache keys) names
+the version the value was actually built for.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Max
+
+VERSION_KEY = 'catalog:version'
+CACHE_TIMEOUT = 60 * 60 * 24
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2.0
+LOCK_POLL = 0.05
+
+
+def _now_version():
+    # Microsecond timestamps double as Last-Modified values for the catalog
+    return time.time_ns() // 1000
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        from .models import Product
+        last_modified = Product.objects.aggregate(last=Max('updated_at'))['last']
+        initial = int(last_modified.timestamp() * 1_000_000) if last_modified else _now_version()
+        cache.add(VERSION_KEY, initial, None)
+        version = cache.get(VERSION_KEY, initial)
+    return version
+
+
+def bump_version():
+    version = max(_now_version(), (cache.get(VERSION_KEY) or 0) + 1)
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def get_or_build(name, builder, timeout=CACHE_TIMEOUT, stale=True):
+    """Return ``(version, value)``, ``value`` being ``builder()`` cached for the catalog version.
+
+    While another worker rebuilds the entry, the previous value is returned
+    with the older version it was built for; with ``stale=False`` it waits
+    for the current one (or builds it) instead.
+    """
+    version = get_version()
+    key = f'catalog:{version}:{name}'
+    previous_key = f'catalog:previous:{name}'
+    value = cache.get(key)
+    if value is not None:
+        return version, value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = builder()
+            cache.set_many({key: value, previous_key: (version, value)}, timeout)
+        finally:
+            cache.delete(lock_key)
+        return version, value
+
+    # Someone else is rebuilding: serve the previous version if we have one
+    if stale:
+        previous = cache.get(previous_key)
+        if previous is not None:
+            return previous
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        value = cache.get(key)
+        if value is not None:
+            return version, value
+    return version, builder()
+
+
+def active_products():
+    """``(version, products)``: active products for the storefront, without the legacy image column."""
+    from .models import Product
+    return get_or_build(
+        'active_products',
+        lambda: list(Product.objects.filter(is_active=True).defer('image')),
+    )
+
+
+def storefront_page(limit):
+    """``(version, products)``: the newest ``limit`` + 1 active products, in api_products order.
+
+    The extra product only tells whether there is a next page.
+    """
+    from .models import Product
+    return get_or_build(
+        f'storefront_page:{limit}',
+        lambda: list(Product.objects.filter(is_active=True).defer('image').order_by('-created_at', '-id')[:limit + 1]),
+    )
+
+
+def active_count():
+    """``(version, count)``: the number of active products, for the storefront's stats."""
+    from .models import Product
+    return get_or_build('active_count', lambda: Product.objects.filter(is_active=True).count())
+
+
+def order_products():
+    """``{product_id: (name, price)}`` of purchasable products, for pricing orders.
+
+    Never the previous version's prices: orders wait for the current ones.
+    """
+    from .models import Product
+    return get_or_build(
+        'order_products',
+        lambda: {
+            product_id: (name, price)
+            for product_id, name, price in Product.objects.filter(is_active=True).values_list('id', 'name', 'price')
+        },
+        stale=False,
+    )[1]
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import SiteSettings
+
+
+def site_settings(request):
+    """Expose the cached SiteSettings as ``settings`` in every template.
+
+    Lazy, so pages that never touch ``settings`` don't pay for the lookup.
+    """
+    return {'settings': SimpleLazyObject(SiteSettings.load)}
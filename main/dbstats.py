@@ -0,0 +1,48 @@
+"""
+Database connection acquire timings and pool state for this process.
+
+Recorded by the backends in queueblaze/db/ each time Django opens (or,
+with DB_POOL, checks out) a connection. Persistent connections should
+keep the count low; a growing count or long waits mean connections are
+not being reused or the pool is too small for the worker's threads.
+"""
+import threading
+from collections import defaultdict
+
+from django.db import connections
+
+from . import metrics
+
+# Upper bounds in seconds, Prometheus-style cumulative buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_acquire = defaultdict(lambda: {'count': 0, 'seconds': 0.0, 'max': 0.0, 'buckets': [0] * len(BUCKETS)})
+_lock = threading.Lock()
+
+
+def record_acquire(alias, seconds):
+    metrics.DB_ACQUIRE.labels(alias).observe(seconds)
+    with _lock:
+        stats = _acquire[alias]
+        stats['count'] += 1
+        stats['seconds'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats['buckets'][i] += 1
+
+
+def acquire_stats():
+    """``{alias: {'count', 'seconds', 'max', 'buckets'}}``; bucket i counts acquires <= BUCKETS[i]."""
+    with _lock:
+        return {alias: {**stats, 'buckets': list(stats['buckets'])} for alias, stats in _acquire.items()}
+
+
+def pool_stats():
+    """psycopg pool counters (pool_size, requests_waiting, requests_wait_ms, ...) per pooled alias."""
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
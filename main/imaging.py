@@ -0,0 +1,92 @@
+"""
+Responsive image variants for product photos.
+
+Each original in the blob store gets a fixed set of resized, re-encoded
+copies (see VARIANTS) so product cards never download a multi-MB phone
+photo. Variants are keyed by the original's hash, which makes them safe
+to regenerate at any time.
+"""
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from . import storage
+
+# Variant name -> widths in pixels (1x/2x where it matters)
+VARIANTS = {
+    'thumb': (120,),
+    'card': (320, 640),
+    'detail': (800, 1600),
+}
+
+# Preferred formats first; AVIF is only produced when Pillow can encode it
+FORMATS = {
+    'avif': {'ext': 'avif', 'content_type': 'image/avif', 'options': {'quality': 55}},
+    'webp': {'ext': 'webp', 'content_type': 'image/webp', 'options': {'quality': 80, 'method': 4}},
+}
+
+CONTENT_TYPES = {spec['ext']: spec['content_type'] for spec in FORMATS.values()}
+
+
+def available_formats():
+    Image.init()
+    return [fmt for fmt in FORMATS if fmt.upper() in Image.SAVE]
+
+
+def variant_folder(image_hash):
+    return f'{storage.IMAGE_PREFIX}/variants/{image_hash}'
+
+
+def variant_key(image_hash, name, width, fmt):
+    return f'{variant_folder(image_hash)}/{name}-{width}.{FORMATS[fmt]["ext"]}'
+
+
+def _target_widths(widths, original_width):
+    # Never upscale; keep at least the smallest width so every variant exists
+    fitting = [w for w in widths if w <= original_width]
+    return fitting or [min(widths[0], original_width)]
+
+
+def generate_variants(image_hash):
+    """Render every variant of a stored original and return the manifest.
+
+    The manifest is stored on ``Product.image_variants`` and looks like
+    ``{'card': {'webp': [320, 640]}, ...}``.
+    """
+    with storage.open_image(image_hash) as fh:
+        original = Image.open(fh)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info or original.mode in ('LA', 'PA') else 'RGB')
+
+    backend = storage.get_storage()
+    formats = available_formats()
+    manifest = {}
+    for name, widths in VARIANTS.items():
+        manifest[name] = {}
+        for width in _target_widths(widths, original.width):
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                key = variant_key(image_hash, name, width, fmt)
+                if backend.exists(key):
+                    backend.delete(key)
+                buf = BytesIO()
+                resized.save(buf, format=fmt.upper(), **FORMATS[fmt]['options'])
+                backend.save(key, ContentFile(buf.getvalue()))
+                manifest[name].setdefault(fmt, []).append(width)
+    return manifest
+
+
+def delete_variants(image_hash):
+    backend = storage.get_storage()
+    folder = variant_folder(image_hash)
+    try:
+        _, files = backend.listdir(folder)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for filename in files:
+        backend.delete(f'{folder}/{filename}')
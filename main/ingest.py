@@ -0,0 +1,176 @@
+"""
+Batched writers for the async checkout and inquiry endpoints.
+
+Under ASGI the async views hand validated, unsaved Orders to a
+BatchWriter. A background task on the event loop collects submissions
+for up to INGEST_MAX_WAIT seconds (or INGEST_BATCH_SIZE items) and writes
+them with one bulk_create per batch, so a burst of checkouts costs a
+handful of transactions instead of one per request. Each caller awaits
+its own result, so a response is only sent once its order is committed.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+from . import rollups
+from .models import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    def __init__(self, name, flush):
+        self.name = name
+        # Sync callable taking a list of items and returning one result per item;
+        # a result that is an Exception is raised in that item's caller
+        self._flush = flush
+        self._queues = {}
+        # A dedicated thread (and so a single DB connection) does all writes.
+        # Deliberately not sync_to_async: when sync middleware wraps the view,
+        # its thread-sensitive executor belongs to a request that is itself
+        # waiting on this batch.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'ingest-{name}')
+
+    @property
+    def max_batch(self):
+        return settings.INGEST_BATCH_SIZE
+
+    @property
+    def max_wait(self):
+        return settings.INGEST_MAX_WAIT
+
+    def _queue(self):
+        # One queue and writer task per event loop (a single loop under uvicorn)
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(loop)
+        if queue is None:
+            queue = self._queues[loop] = asyncio.Queue()
+            loop.create_task(self._run(queue))
+        return queue
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue().put((item, future))
+        return await future
+
+    async def _run(self, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self._flush_with_connection, items)
+            except Exception as e:
+                logger.exception('%s batch of %d failed', self.name, len(batch))
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _flush_with_connection(self, items):
+        # The writer runs outside the request cycle, so manage the connection here
+        close_old_connections()
+        try:
+            return self._flush(items)
+        finally:
+            close_old_connections()
+
+
+def _refresh_rollups(orders):
+    # bulk_create sends no post_save, so update the dashboard rollups here;
+    # the orders are already committed, so a failure must not fail the batch
+    try:
+        rollups.add_orders(orders)
+    except Exception:
+        logger.exception('Sales rollup refresh failed')
+
+
+def _existing_order_ids(keys):
+    if not keys:
+        return {}
+    return dict(Order.objects.filter(idempotency_key__in=keys).values_list('idempotency_key', 'id'))
+
+
+def _save_order_alone(order, rows):
+    order.pk = None
+    order._state.adding = True
+    try:
+        order.save_with_items(rows)
+    except IntegrityError:
+        existing = _existing_order_ids([order.idempotency_key]) if order.idempotency_key else {}
+        if order.idempotency_key in existing:
+            return existing[order.idempotency_key], True
+        raise
+    return order.id, False
+
+
+def write_orders(entries):
+    """Insert (order, rows) pairs in one transaction; returns (order_id, duplicate) per entry."""
+    results = [None] * len(entries)
+    existing = _existing_order_ids([order.idempotency_key for order, _ in entries if order.idempotency_key])
+    first_with_key = {}
+    repeats = {}
+    pending = []
+    for i, (order, rows) in enumerate(entries):
+        key = order.idempotency_key
+        if key in existing:
+            results[i] = (existing[key], True)
+        elif key and key in first_with_key:
+            repeats[i] = first_with_key[key]
+        else:
+            if key:
+                first_with_key[key] = i
+            pending.append((i, order, rows))
+
+    try:
+        with transaction.atomic():
+            Order.objects.bulk_create([order for _, order, _ in pending])
+            items = []
+            for _, order, rows in pending:
+                for row in rows:
+                    row.order = order
+                    row.created_at = order.created_at
+                    items.append(row)
+            OrderItem.objects.bulk_create(items)
+        for i, order, _ in pending:
+            results[i] = (order.id, False)
+        _refresh_rollups([order for _, order, _ in pending])
+    except IntegrityError:
+        # Usually a retry racing a key committed after our lookup; isolate it
+        for i, order, rows in pending:
+            try:
+                results[i] = _save_order_alone(order, rows)
+            except Exception as e:
+                results[i] = e
+
+    for i, first in repeats.items():
+        result = results[first]
+        results[i] = result if isinstance(result, Exception) else (result[0], True)
+    return results
+
+
+def write_inquiries(entries):
+    Order.objects.bulk_create(entries)
+    _refresh_rollups(entries)
+    return [order.id for order in entries]
+
+
+orders = BatchWriter('orders', write_orders)
+inquiries = BatchWriter('inquiries', write_inquiries)
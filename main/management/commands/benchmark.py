@@ -0,0 +1,69 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from main import benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the main views through the test client, or a running server with --url, '
+            'and save the results as JSON. Checkout scenarios create real orders.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=benchmarks.SCENARIO_NAMES,
+                            help='Scenario to run; repeat for several (default: all)')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--url', help='Base URL of a running server to drive over HTTP, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=8, help='Connections for --url')
+        parser.add_argument('--output', help='JSON file for the results (default: benchmark-<database>-<mode>-<time>.json)')
+        parser.add_argument('--compare', help='Earlier results file to compare against')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['warmup'] < 0 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive, --warmup not negative')
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+
+        try:
+            selected = benchmarks.scenarios(options['scenario'])
+            if options['url']:
+                mode = 'http'
+                scenario_results = benchmarks.run_http(
+                    options['url'], selected, options['requests'], options['warmup'], options['concurrency'],
+                )
+            else:
+                mode = 'client'
+                scenario_results = benchmarks.run_client(selected, options['requests'], options['warmup'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        result = benchmarks.results(
+            mode, scenario_results, requests=options['requests'], warmup=options['warmup'],
+            url=options['url'], concurrency=options['concurrency'] if options['url'] else 1,
+        )
+        output = options['output'] or f'benchmark-{connection.vendor}-{mode}-{time.strftime("%Y%m%dT%H%M%S")}.json'
+        with open(output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+        self.stdout.write(f'{"":<24}{"req/s":>9}{"p50":>10}{"p95":>10}{"p99":>10}{"queries":>9}{"peak mem":>10}{"errors":>8}')
+        for name, r in scenario_results.items():
+            queries = f'{r["queries_mean"]:.1f}' if r['queries_mean'] is not None else '-'
+            memory = f'{r["peak_memory_bytes"] / 1024:.0f}K' if r['peak_memory_bytes'] is not None else '-'
+            self.stdout.write(
+                f'{name:<24}{r["throughput"]:>9.1f}{r["p50_ms"]:>8.1f}ms{r["p95_ms"]:>8.1f}ms{r["p99_ms"]:>8.1f}ms'
+                f'{queries:>9}{memory:>10}{r["errors"]:>8}'
+            )
+        if previous:
+            self.stdout.write(f'\nCompared with {options["compare"]}:')
+            for name, metric, before, after, change in benchmarks.compare(previous, result):
+                delta = f'{change:+.1f}%' if change is not None else 'n/a'
+                self.stdout.write(f'  {name:<24}{metric:<14}{before:>10.1f} -> {after:<10.1f}{delta:>8}')
+        self.stdout.write(self.style.SUCCESS(f'Saved {output}'))
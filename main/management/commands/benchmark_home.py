@@ -0,0 +1,45 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from main import views
+
+
+class Command(BaseCommand):
+    help = 'Measure home page render time with and without fragment caching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100)
+
+    def _measure(self, iterations):
+        factory = RequestFactory()
+        # Warm-up request fills the catalog and fragment caches
+        views.home(factory.get('/'))
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            views.home(factory.get('/'))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'mean': statistics.mean(timings),
+            'p50': timings[len(timings) // 2],
+            'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        }
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        with override_settings(FRAGMENT_CACHE_TIMEOUT=0):
+            uncached = self._measure(iterations)
+        cached = self._measure(iterations)
+
+        self.stdout.write(f'{"":<18}{"mean":>10}{"p50":>10}{"p95":>10}')
+        for label, result in (('without fragments', uncached), ('with fragments', cached)):
+            self.stdout.write(
+                f'{label:<18}' + ''.join(f'{result[k]:>8.2f}ms' for k in ('mean', 'p50', 'p95'))
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Fragment caching speedup: {uncached["mean"] / cached["mean"]:.1f}x'
+        ))
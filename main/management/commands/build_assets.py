@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import assets
+
+
+def _kb(size):
+    return f'{size / 1024:.1f}K' if size is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Minify the front-end bundles and extract critical CSS (run before collectstatic)'
+
+    def handle(self, *args, **options):
+        try:
+            report = assets.build()
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'{"":<20}{"source":>9}{"built":>9}{"gzip":>9}{"brotli":>9}{"saved":>8}')
+        for name, sizes in report.items():
+            source, built = sizes['source'], sizes['built']
+            saved = f'{1 - built["bytes"] / source["bytes"]:.0%}' if source else ''
+            self.stdout.write(
+                f'{name:<20}{_kb(source["bytes"] if source else None):>9}{_kb(built["bytes"]):>9}'
+                f'{_kb(built["gzip"]):>9}{_kb(built["brotli"]):>9}{saved:>8}'
+            )
+        critical = report[assets.CRITICAL_CSS]['built']
+        if critical['gzip'] > assets.CRITICAL_BUDGET:
+            self.stderr.write(f'Critical CSS is {_kb(critical["gzip"])} gzipped, over the '
+                              f'{_kb(assets.CRITICAL_BUDGET)} budget; check the critical markers in the templates')
+        self.stdout.write(self.style.SUCCESS(f'Built {len(assets.BUNDLES)} bundle(s) into {assets.build_dir()}'))
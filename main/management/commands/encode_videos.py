@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import video
+
+
+def _mb(size):
+    return f'{size / 1024 / 1024:.1f}M'
+
+
+class Command(BaseCommand):
+    help = 'Encode smaller renditions and a poster frame of background videos (commit the output)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sources', nargs='*', default=[video.HERO_VIDEO],
+                            help='Static paths of the videos (defaults to the home page hero)')
+        parser.add_argument('--ffmpeg', help='Path to the ffmpeg binary')
+        parser.add_argument('--poster-at', type=float, default=0.0,
+                            help='Seconds into the video to take the poster frame from')
+        parser.add_argument('--force', action='store_true', help='Re-encode renditions that already exist')
+
+    def handle(self, *args, **options):
+        for source in options['sources']:
+            self.stdout.write(f'Encoding {source}')
+            try:
+                manifest = video.encode(
+                    source, ffmpeg=options['ffmpeg'], poster_at=options['poster_at'], force=options['force'],
+                    progress=lambda name: self.stdout.write(f'  {name}'),
+                )
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+            for rendition in manifest['renditions']:
+                self.stdout.write(f'  {rendition["width"]}x{rendition["height"]}: {_mb(rendition["bytes"])}')
+            self.stdout.write(self.style.SUCCESS(f'Wrote {video.rendition_dir(source)}/{video.MANIFEST}'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import exports
+
+
+class Command(BaseCommand):
+    help = 'Stream orders with their line items as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--status', default='')
+        parser.add_argument('--payment-method', default='')
+        parser.add_argument('--from', dest='date_from', default='', help='First local day to include (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', default='', help='Last local day to include (YYYY-MM-DD)')
+        parser.add_argument('--output', help='File to write to (default: stdout)')
+
+    def handle(self, *args, **options):
+        filters = {
+            'status': options['status'],
+            'payment_method': options['payment_method'],
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+        }
+        try:
+            rows = exports.iter_export(options['format'], filters)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(rows)
+        else:
+            for row in rows:
+                self.stdout.write(row, ending='')
@@ -0,0 +1,26 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import product_io
+
+
+class Command(BaseCommand):
+    help = 'Write the product catalog as CSV/JSON, optionally with a zip of its images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the .csv or .json catalog to write')
+        parser.add_argument('--images-zip', help='Also write the product images to this .zip')
+
+    def handle(self, *args, **options):
+        export_format = os.path.splitext(options['output'])[1].lower().lstrip('.')
+        if export_format not in ('csv', 'json'):
+            raise CommandError('The output must be a .csv or .json file')
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+            product_io.write_catalog(f, export_format)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+
+        if options['images_zip']:
+            count = product_io.write_images_zip(options['images_zip'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {count} image(s) to {options["images_zip"]}'))
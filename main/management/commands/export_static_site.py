@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main import prerender
+
+
+class Command(BaseCommand):
+    help = 'Prerender the storefront and catalog snapshot for the Netlify site (only when the catalog changed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.STATIC_SITE_DIR,
+                            help='Directory Netlify publishes (defaults to STATIC_SITE_DIR)')
+        parser.add_argument('--origin', default=settings.STATIC_SITE_ORIGIN,
+                            help='URL of the Django deployment dynamic paths are proxied to')
+        parser.add_argument('--force', action='store_true',
+                            help='Render even if the catalog and settings are unchanged')
+
+    def handle(self, *args, **options):
+        if not options['origin']:
+            raise CommandError('Set STATIC_SITE_ORIGIN or pass --origin')
+        try:
+            report = prerender.export(options['output'], options['origin'], force=options['force'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        if report['skipped']:
+            self.stdout.write(f'Catalog version {report["version"]} already exported to {options["output"]}')
+            return
+        for name in report['written']:
+            self.stdout.write(f'  wrote {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported catalog version {report["version"]} ({len(report["written"])} file(s) changed)'
+        ))
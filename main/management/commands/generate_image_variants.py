@@ -0,0 +1,68 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from main.models import Product
+from main import catalog, imaging
+
+
+def _init_worker():
+    # Needed when the pool uses the spawn start method (macOS/Windows)
+    django.setup()
+
+
+def _render(image_hash):
+    return image_hash, imaging.generate_variants(image_hash)
+
+
+class Command(BaseCommand):
+    help = 'Regenerate responsive image variants for all product images in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (defaults to the number of CPU cores)')
+        parser.add_argument('--missing', action='store_true',
+                            help='Only render images that have no variants yet')
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image_hash__isnull=True).exclude(image_hash='')
+        if options['missing']:
+            products = products.filter(image_variants={})
+        hashes = sorted(set(products.values_list('image_hash', flat=True)))
+        if not hashes:
+            self.stdout.write('No product images to process')
+            return
+
+        workers = max(1, min(options['workers'], len(hashes)))
+        self.stdout.write(f'Rendering variants for {len(hashes)} image(s) on {workers} worker(s)')
+
+        # Forked workers must not inherit the parent's open DB connection
+        connections.close_all()
+        started = time.monotonic()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, image_hash) for image_hash in hashes]
+            for future in as_completed(futures):
+                try:
+                    image_hash, manifest = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Variant rendering failed: {e}')
+                    continue
+                Product.objects.filter(image_hash=image_hash).update(
+                    image_variants=manifest, updated_at=timezone.now()
+                )
+                done += 1
+
+        if done:
+            # .update() bypasses the Product signals
+            catalog.bump_version()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {done} image(s) in {elapsed:.1f}s; {failed} failed'
+        ))
@@ -0,0 +1,35 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import product_io
+
+
+class Command(BaseCommand):
+    help = 'Create or update products from a CSV/JSON catalog, keyed on SKU'
+
+    def add_arguments(self, parser):
+        parser.add_argument('catalog', help='Path to a .csv or .json catalog')
+        parser.add_argument('--images', help='Folder or .zip holding the files named in the image column')
+        parser.add_argument('--workers', type=int, default=product_io.default_workers(),
+                            help='Image processing threads (defaults to the number of CPU cores)')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['catalog'], 'rb') as f:
+                rows = product_io.read_catalog(f, options['catalog'])
+            images = product_io.open_images(options['images']) if options['images'] else None
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'Importing {len(rows)} row(s) from {os.path.basename(options["catalog"])}')
+        report = product_io.import_products(rows, images, workers=options['workers'])
+
+        for error in report['errors']:
+            self.stderr.write(error)
+        for stage, seconds in report['timings'].items():
+            self.stdout.write(f'  {stage:<10}{seconds:>8.2f}s')
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']}, updated {report['updated']}, unchanged {report['unchanged']}; "
+            f"{report['images']} image(s) processed, {len(report['errors'])} error(s)"
+        ))
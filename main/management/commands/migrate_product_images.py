@@ -0,0 +1,61 @@
+import base64
+import binascii
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main.models import Product
+from main import catalog, storage
+
+
+class Command(BaseCommand):
+    help = 'Move base64 product images out of Product.image into the blob store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Rows to load per query (each row carries a full image)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be moved without writing anything')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        pending = (
+            Product.objects.exclude(image__isnull=True).exclude(image='')
+            .only('id', 'image', 'image_content_type')
+            .order_by('id')
+        )
+
+        moved = failed = 0
+        total_bytes = 0
+        last_id = 0
+        # Page by primary key so each query only holds one batch of blobs in memory
+        while True:
+            batch = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            for product in batch:
+                try:
+                    data = base64.b64decode(product.image, validate=True)
+                except (binascii.Error, ValueError):
+                    failed += 1
+                    self.stderr.write(f'Product #{product.id}: image is not valid base64, skipped')
+                    continue
+                total_bytes += len(data)
+                if dry_run:
+                    moved += 1
+                    continue
+                image_hash = storage.save_image(data)
+                Product.objects.filter(id=product.id).update(
+                    image_hash=image_hash, image=None, updated_at=timezone.now()
+                )
+                moved += 1
+
+        if moved and not dry_run:
+            # .update() bypasses the Product signals
+            catalog.bump_version()
+        verb = 'Would move' if dry_run else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {moved} image(s), {total_bytes / 1024:.1f} KB; {failed} failed'
+        ))
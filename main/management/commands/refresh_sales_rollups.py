@@ -0,0 +1,28 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import rollups
+
+
+class Command(BaseCommand):
+    help = 'Refresh the daily sales rollups behind the admin dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every day from scratch')
+        parser.add_argument('--since', help='Refresh days with orders updated on or after this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = rollups.day_bounds(date.fromisoformat(options['since']))[0]
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        started = time.perf_counter()
+        days = rollups.refresh_since(since, full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {days} day(s) of sales rollups in {time.perf_counter() - started:.2f}s'
+        ))
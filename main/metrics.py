@@ -0,0 +1,67 @@
+"""
+Prometheus metrics, served in the text format at /metrics.
+
+Every gunicorn worker counts in its own process. With
+PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py sets it up) prometheus_client
+keeps the values in memory-mapped files there, and a scrape adds up the
+files of every worker, past and present, so the totals are the same
+whichever worker answers and survive worker recycling. Without it
+(runserver, tests) the process's own values are served.
+
+Only counters and histograms are used: they add up across processes
+without any per-worker bookkeeping.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    'queueblaze_http_request_duration_seconds', 'Time to build a response, by URL name',
+    ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+REQUESTS = Counter(
+    'queueblaze_http_responses', 'Responses by URL name and status class',
+    ['view', 'method', 'status'],
+)
+RESPONSE_SIZE = Histogram(
+    'queueblaze_http_response_size_bytes', 'Response body size, by URL name',
+    ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+ORDERS_CREATED = Counter('queueblaze_orders_created', 'Checkout orders created', ['payment_method'])
+INQUIRIES_CREATED = Counter('queueblaze_inquiries_created', 'Contact inquiries created')
+RATE_LIMITED = Counter('queueblaze_rate_limit_rejections', 'Requests rejected by a rate limit', ['limit'])
+CACHE_REQUESTS = Counter(
+    'queueblaze_cache_requests', 'Cache reads by key namespace and result (l1_hit, l2_hit, miss)',
+    ['namespace', 'result'],
+)
+CACHE_ERRORS = Counter('queueblaze_cache_errors', 'Failed calls to the shared cache tier', ['namespace'])
+DB_ACQUIRE = Histogram('queueblaze_db_connection_acquire_seconds', 'Time to open or check out a connection', ['alias'])
+
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+def observe_response(request, response, seconds):
+    """Record a finished request under its URL name (``unmatched`` for 404s outside the URLconf)."""
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unmatched'
+    method = request.method if request.method in METHODS else 'other'
+    REQUEST_LATENCY.labels(view, method).observe(seconds)
+    REQUESTS.labels(view, method, f'{response.status_code // 100}xx').inc()
+    # Streamed bodies aren't known up front; count them only if the length was declared
+    size = response.get('Content-Length') if response.streaming else len(response.content)
+    if size is not None:
+        RESPONSE_SIZE.labels(view).observe(int(size))
+
+
+def render():
+    """The current metrics of every worker, in the Prometheus text format."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
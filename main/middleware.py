@@ -0,0 +1,129 @@
+"""
+Request middleware for QueueBlaze.
+"""
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+from django.utils.decorators import sync_and_async_middleware
+
+from . import metrics, querystats
+
+logger = logging.getLogger(__name__)
+
+
+def _health(request):
+    body = {'status': 'ok'}
+    status = 200
+    if request.GET.get('db'):
+        try:
+            connection.ensure_connection()
+            body['database'] = 'ok'
+        except DatabaseError:
+            body.update(status='error', database='unavailable')
+            status = 503
+    response = JsonResponse(body, status=status)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@sync_and_async_middleware
+def health_check_middleware(get_response):
+    """Answer HEALTH_CHECK_PATH before any other middleware runs.
+
+    First in MIDDLEWARE, so the platform's probe skips the HTTPS redirect,
+    host validation and sessions, and by default touches neither the
+    database nor the cache. ``?db=1`` also checks that a database
+    connection can be made.
+    """
+    path = settings.HEALTH_CHECK_PATH
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if request.path != path:
+                return await get_response(request)
+            if request.GET.get('db'):
+                return await sync_to_async(_health)(request)
+            return _health(request)
+    else:
+        def middleware(request):
+            if request.path != path:
+                return get_response(request)
+            return _health(request)
+    return middleware
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else '-'
+
+
+def _report_queries(request, response, queries, seconds):
+    """Add the Server-Timing header and log anything worth a look."""
+    response['Server-Timing'] = (
+        f'db;desc="{queries.count} queries";dur={queries.seconds * 1000:.1f}, '
+        f'total;dur={seconds * 1000:.1f}'
+    )
+    where = f'{request.method} {request.path} ({_view_name(request)})'
+    if seconds >= settings.SLOW_REQUEST_SECONDS:
+        logger.warning('Slow request %s: %.2fs, %d queries in %.2fs',
+                       where, seconds, queries.count, queries.seconds)
+    for sql, count in queries.repeated(settings.QUERY_REPEAT_THRESHOLD):
+        logger.warning('Query repeated %d times in %s (N+1?): %.200s', count, where, sql)
+
+    match = getattr(request, 'resolver_match', None)
+    budget = getattr(match.func, 'query_budget', None) if match else None
+    if budget is not None and queries.count > budget:
+        message = f'{where} ran {queries.count} queries; its budget is {budget}'
+        if settings.QUERY_BUDGET_ENFORCE:
+            raise querystats.QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+@sync_and_async_middleware
+def query_stats_middleware(get_response):
+    """Record the SQL of a sample of requests (see main/querystats.py)."""
+    def sampled():
+        return settings.QUERY_BUDGET_ENFORCE or random.random() < settings.QUERY_STATS_SAMPLE_RATE
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not sampled():
+                return await get_response(request)
+            started = time.perf_counter()
+            with querystats.record() as queries:
+                response = await get_response(request)
+            _report_queries(request, response, queries, time.perf_counter() - started)
+            return response
+    else:
+        def middleware(request):
+            if not sampled():
+                return get_response(request)
+            started = time.perf_counter()
+            with querystats.record() as queries:
+                response = get_response(request)
+            _report_queries(request, response, queries, time.perf_counter() - started)
+            return response
+    return middleware
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Time every response for /metrics (see main/metrics.py)."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            response = await get_response(request)
+            metrics.observe_response(request, response, time.perf_counter() - started)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            response = get_response(request)
+            metrics.observe_response(request, response, time.perf_counter() - started)
+            return response
+    return middleware
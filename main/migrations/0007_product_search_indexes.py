@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+def _postgres_indexes():
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    from main.search import search_vector
+    return [
+        GinIndex(search_vector(), name='product_search_vector_idx'),
+        GinIndex(OpClass('name', name='gin_trgm_ops'), name='product_name_trgm_idx'),
+    ]
+
+
+def add_postgres_search_indexes(apps, schema_editor):
+    # Full-text and trigram indexes only exist on PostgreSQL; SQLite falls
+    # back to substring matching (see main/search.py)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    Product = apps.get_model('main', 'Product')
+    for index in _postgres_indexes():
+        schema_editor.add_index(Product, index)
+
+
+def remove_postgres_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Product = apps.get_model('main', 'Product')
+    for index in _postgres_indexes():
+        schema_editor.remove_index(Product, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_product_catalog_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'category'], name='product_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'strain'], name='product_strain_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'price'], name='product_price_idx'),
+        ),
+        migrations.RunPython(add_postgres_search_indexes, remove_postgres_search_indexes),
+    ]
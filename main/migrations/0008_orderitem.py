@@ -0,0 +1,79 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:15
+
+import json
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_CHUNK_SIZE = 500
+
+
+def backfill_order_items(apps, schema_editor):
+    """Create OrderItem rows from the items_json of existing orders, in chunks"""
+    Order = apps.get_model('main', 'Order')
+    OrderItem = apps.get_model('main', 'OrderItem')
+    Product = apps.get_model('main', 'Product')
+    product_ids = set(Product.objects.values_list('id', flat=True))
+
+    last_id = 0
+    while True:
+        chunk = list(
+            Order.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values('id', 'items_json', 'created_at')[:BACKFILL_CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1]['id']
+        rows = []
+        for order in chunk:
+            try:
+                items = json.loads(order['items_json'] or '[]')
+            except ValueError:
+                continue
+            for item in items if isinstance(items, list) else []:
+                if not isinstance(item, dict):
+                    continue
+                try:
+                    unit_price = Decimal(str(item.get('price', 0)))
+                    quantity = max(1, int(item.get('quantity', 1)))
+                except (InvalidOperation, TypeError, ValueError):
+                    continue
+                product_id = item.get('id')
+                rows.append(OrderItem(
+                    order_id=order['id'],
+                    product_id=product_id if product_id in product_ids else None,
+                    product_name=str(item.get('name', ''))[:200],
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    created_at=order['created_at'],
+                ))
+        OrderItem.objects.bulk_create(rows, batch_size=BACKFILL_CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=200)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='main.order')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', to='main.product')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['product', 'created_at'], name='orderitem_product_sold_idx'), models.Index(fields=['created_at'], name='orderitem_created_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_order_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_order_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('dimension', models.CharField(choices=[('status', 'Status'), ('product', 'Product'), ('category', 'Category')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=100)),
+                ('label', models.CharField(blank=True, max_length=200)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-day', 'dimension', 'key'],
+                'indexes': [models.Index(fields=['dimension', 'day'], name='salesrollup_dimension_day_idx'), models.Index(fields=['refreshed_at'], name='salesrollup_refreshed_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'dimension', 'key'), name='salesrollup_day_dimension_key_uniq')],
+            },
+        ),
+    ]
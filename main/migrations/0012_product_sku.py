@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+def backfill_skus(apps, schema_editor):
+    """Give existing products the same default SKU Product.save() assigns"""
+    Product = apps.get_model('main', 'Product')
+    products = list(Product.objects.filter(sku__isnull=True).only('id'))
+    for product in products:
+        product.sku = f"QB-{product.id:05d}"
+    Product.objects.bulk_update(products, ['sku'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_salesrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_skus, migrations.RunPython.noop),
+    ]
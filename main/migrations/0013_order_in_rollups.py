@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_product_sku'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='salesrollup',
+            name='salesrollup_refreshed_idx',
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='in_rollups',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('in_rollups', False)), fields=['created_at'], name='order_rollup_pending_idx'),
+        ),
+    ]
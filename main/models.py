@@ -1,5 +1,11 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from decimal import Decimal
 import os
+import time
 import base64
 
 # Create your models here.
@@ -64,13 +70,20 @@ class Product(models.Model):
     ]
     
     name = models.CharField(max_length=200)
+    # Stable key for bulk import/export (main/product_io.py); filled with
+    # default_sku() when a product is saved without one
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='flower')
     strain = models.CharField(max_length=20, choices=STRAIN_CHOICES, default='hybrid')
     thc = models.CharField(max_length=50, blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     icon = models.CharField(max_length=10, choices=ICON_CHOICES, default='🌿')
-    # Store image as base64 in database
-    image = models.TextField(blank=True, null=True)  # Base64 encoded image
+    # Legacy base64 image column - moved to the blob store by `manage.py migrate_product_images`
+    image = models.TextField(blank=True, null=True)
+    # SHA-256 key of the image in the product image blob store (see main/storage.py)
+    image_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    # Manifest of generated responsive variants, e.g. {'card': {'webp': [320, 640]}}
+    image_variants = models.JSONField(default=dict, blank=True)
     image_content_type = models.CharField(max_length=50, blank=True, null=True)  # e.g., 'image/jpeg'
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
@@ -79,20 +92,101 @@ class Product(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the active catalog (api_products)
+            models.Index(fields=['is_active', '-created_at', '-id'], name='product_catalog_idx'),
+            # Facet filters in main/search.py
+            models.Index(fields=['is_active', 'category'], name='product_category_idx'),
+            models.Index(fields=['is_active', 'strain'], name='product_strain_idx'),
+            models.Index(fields=['is_active', 'price'], name='product_price_idx'),
+        ]
     
     def __str__(self):
         return self.name
     
+    def default_sku(self):
+        return f"QB-{self.pk:05d}"
+    
+    def save(self, *args, **kwargs):
+        # Blank SKUs are stored as NULL so they never collide on the unique index
+        self.sku = self.sku or None
+        super().save(*args, **kwargs)
+        if not self.sku:
+            self.sku = self.default_sku()
+            Product.objects.filter(pk=self.pk).update(sku=self.sku)
+    
     def delete(self, *args, **kwargs):
-        # Image is stored in database, no file to delete
-        super().delete(*args, **kwargs)
+        from .storage import release_image
+        image_hash = self.image_hash
+        result = super().delete(*args, **kwargs)
+        release_image(image_hash)
+        return result
+    
+    def set_image(self, upload):
+        """Store an uploaded image and render its responsive variants"""
+        from . import imaging, storage
+        self.image = None
+        self.image_hash = storage.save_image(upload)
+        self.image_content_type = upload.content_type
+        try:
+            self.image_variants = imaging.generate_variants(self.image_hash)
+        except (OSError, Image.DecompressionBombError):
+            # Not something Pillow can decode; serve the original as uploaded
+            self.image_variants = {}
+    
+    def clear_image(self):
+        self.image = None
+        self.image_hash = None
+        self.image_content_type = None
+        self.image_variants = {}
     
     @property
     def image_url(self):
-        """Return image as data URL for display"""
-        if self.image:
+        """Return the blob store URL, or a data URL for rows not yet backfilled"""
+        if self.image_hash:
+            return reverse('product_image', args=[self.image_hash])
+        # Never lazy-load the legacy column when a catalog query deferred it
+        if 'image' not in self.get_deferred_fields() and self.image:
             return f"data:{self.image_content_type};base64,{self.image}"
         return None
+    
+    def _variant_urls(self, name, fmt):
+        from .imaging import FORMATS
+        widths = (self.image_variants or {}).get(name, {}).get(fmt, [])
+        if not self.image_hash or not widths:
+            return []
+        base = reverse('product_image', args=[self.image_hash])
+        return [(f"{base}/{name}-{width}.{FORMATS[fmt]['ext']}", width) for width in widths]
+    
+    def _sources(self, name):
+        """<source> attributes for a variant, best format first"""
+        from .imaging import FORMATS
+        sources = []
+        for fmt, spec in FORMATS.items():
+            urls = self._variant_urls(name, fmt)
+            if urls:
+                sources.append({
+                    'type': spec['content_type'],
+                    'srcset': ', '.join(f"{url} {width}w" for url, width in urls),
+                })
+        return sources
+    
+    @property
+    def card_sources(self):
+        return self._sources('card')
+    
+    @property
+    def detail_sources(self):
+        return self._sources('detail')
+    
+    @property
+    def thumb_url(self):
+        """Small admin/cart thumbnail, falling back to the original"""
+        for fmt in ('webp', 'avif'):
+            urls = self._variant_urls('thumb', fmt)
+            if urls:
+                return urls[0][0]
+        return self.image_url
 
 
 class SiteSettings(models.Model):
@@ -118,12 +212,36 @@ class SiteSettings(models.Model):
     
     is_active = models.BooleanField(default=True)
     
+    CACHE_KEY = 'site_settings'
+    # Seconds a worker trusts its own copy before re-checking the shared cache
+    LOCAL_TTL = 10
+    _local = {'value': None, 'expires': 0.0}
+    
     class Meta:
         verbose_name = 'Site Settings'
         verbose_name_plural = 'Site Settings'
     
     def __str__(self):
         return self.site_name
+    
+    @classmethod
+    def load(cls):
+        """Return the singleton row from process memory, the shared cache, or the DB"""
+        now = time.monotonic()
+        local = cls._local
+        if local['value'] is not None and now < local['expires']:
+            return local['value']
+        value = cache.get(cls.CACHE_KEY)
+        if value is None:
+            value, created = cls.objects.get_or_create(id=1)
+            cache.set(cls.CACHE_KEY, value, None)
+        local['value'], local['expires'] = value, now + cls.LOCAL_TTL
+        return value
+    
+    @classmethod
+    def clear_cache(cls):
+        cache.delete(cls.CACHE_KEY)
+        cls._local['value'] = None
 
 
 class Order(models.Model):
@@ -146,6 +264,13 @@ class Order(models.Model):
         ('stripe', 'Credit Card'),
     ]
     
+    # Delivery tiers in Rand - must match the options shown in checkout.html
+    SHIPPING_PRICES = {
+        'standard': Decimal('150.00'),
+        'express': Decimal('250.00'),
+        'overnight': Decimal('350.00'),
+    }
+    
     # Customer Info
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
@@ -175,11 +300,138 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     notes = models.TextField(blank=True)
     
+    # Client-generated key so retried checkout submissions map to one order
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    
+    # Whether the sales rollups count the order as it is now (main/rollups.py);
+    # cleared on every save, so the rollup refresh finds the days to rebuild
+    in_rollups = models.BooleanField(default=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Admin order list: keyset pages on (created_at, id), optionally
+            # narrowed by status or payment method
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='order_status_created_idx'),
+            models.Index(fields=['payment_method', '-created_at', '-id'], name='order_payment_created_idx'),
+            # Orders the sales rollups have yet to count; only ever a few rows
+            models.Index(fields=['created_at'], condition=models.Q(in_rollups=False), name='order_rollup_pending_idx'),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.first_name} {self.last_name}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.in_rollups = False
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'in_rollups'}
+        super().save(*args, **kwargs)
+    
+    def build_items(self, items):
+        """Turn checkout cart items into unsaved OrderItem rows priced from the catalog"""
+        from . import catalog
+        products = catalog.order_products()
+        rows = []
+        for item in items:
+            try:
+                product_id = int(item.get('id'))
+                quantity = int(item.get('quantity', 1))
+            except (AttributeError, TypeError, ValueError):
+                raise ValueError(f"Invalid cart item: {item!r}")
+            if quantity < 1:
+                raise ValueError(f"Invalid cart item: {item!r}")
+            if product_id not in products:
+                raise ValueError(f"Product #{product_id} is no longer available")
+            name, unit_price = products[product_id]
+            rows.append(OrderItem(
+                product_id=product_id,
+                product_name=name,
+                quantity=quantity,
+                unit_price=unit_price,
+            ))
+        return rows
+    
+    def apply_totals(self, rows):
+        """Set subtotal, shipping and total from priced rows - never from the browser"""
+        self.subtotal = sum((row.line_total for row in rows), Decimal('0.00'))
+        if self.delivery_type == 'pickup':
+            self.shipping = Decimal('0.00')
+        else:
+            self.shipping = self.SHIPPING_PRICES.get(self.shipping_option, self.SHIPPING_PRICES['standard'])
+        self.total_amount = self.subtotal + self.shipping
+    
+    def save_with_items(self, rows):
+        with transaction.atomic():
+            self.save()
+            for row in rows:
+                row.order = self
+                row.created_at = self.created_at
+            OrderItem.objects.bulk_create(rows)
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    # Null once the product is deleted; the name and price below are kept
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_items')
+    
+    # Snapshot at time of sale
+    product_name = models.CharField(max_length=200)
+    quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    # Copy of the order's created_at so per-product reports need no join
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='orderitem_product_sold_idx'),
+            models.Index(fields=['created_at'], name='orderitem_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name}"
+    
+    @property
+    def line_total(self):
+        return self.unit_price * self.quantity
+
+
+class SalesRollup(models.Model):
+    """Per-day order totals by status, product and category, maintained by main/rollups.py"""
+    DIMENSION_CHOICES = [
+        ('status', 'Status'),
+        ('product', 'Product'),
+        ('category', 'Category'),
+    ]
+    
+    # Local calendar day (TIME_ZONE) the orders were placed on
+    day = models.DateField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    # Status value, product id or category value; empty for deleted products
+    key = models.CharField(max_length=100, blank=True)
+    label = models.CharField(max_length=200, blank=True)
+    
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    # When the day was last rebuilt (or the row first written)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-day', 'dimension', 'key']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'dimension', 'key'], name='salesrollup_day_dimension_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['dimension', 'day'], name='salesrollup_dimension_day_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.dimension}={self.key}"
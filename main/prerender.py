@@ -0,0 +1,176 @@
+"""
+Static export of the storefront for the Netlify site.
+
+export() renders the home page with the live catalog and site settings
+into index.html and writes a JSON snapshot of the same data
+(catalog.json), so anonymous visitors are served entirely by the CDN.
+It also writes the rules that proxy the paths only Django can answer
+(checkout, the APIs, the admin panels and product images) to the Django
+origin, at the top of netlify.toml: only rules there can be signed. From
+the browser's side those paths stay same-origin, so checkout and the
+contact form post to /api/ as before.
+
+With STATIC_SITE_PROXY_SECRET set, the rules are signed: Netlify adds an
+X-Nf-Sign token made with the variable of that name on Netlify, and the
+origin's rate limiter (main/ratelimit.py) trusts the client address
+Netlify forwarded only on requests whose token it can verify.
+
+The snapshot records the catalog version (main/catalog.py) and a
+fingerprint of the settings, templates, static asset URLs and origin it
+was rendered with. A run finds them unchanged and writes nothing, so a
+scheduled export only produces a new deploy after the catalog or a
+deploy of the origin changed the page. Use force after changing other
+things the page depends on.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.template.loader import get_template
+from django.templatetags.static import static
+from django.test import RequestFactory
+
+from . import api, assets, catalog, video, views
+from .models import SiteSettings
+
+INDEX = 'index.html'
+SNAPSHOT = 'catalog.json'
+REDIRECTS = '_redirects'
+NETLIFY_CONFIG = 'netlify.toml'
+RULES_BEGIN = '# --- Proxied to the Django origin; written by `manage.py export_static_site` ---'
+RULES_END = '# --- End of the proxied paths ---'
+# Netlify variable the proxied requests are signed with (settings.STATIC_SITE_PROXY_SECRET)
+SIGNING_VARIABLE = 'STATIC_SITE_PROXY_SECRET'
+TEMPLATES = ['base.html', 'home.html']
+# SiteSettings shown on the storefront; the bank details stay on the checkout page
+PUBLIC_SETTINGS = [
+    'site_name', 'site_description', 'contact_phone', 'contact_email', 'contact_address',
+    'whatsapp_number', 'operating_hours', 'about_title', 'about_content', 'hero_title', 'hero_subtitle',
+]
+# Served by Django through Netlify's proxy. Static files committed to the
+# repository are published as they are; the rest (fingerprinted bundles)
+# fall through to the origin.
+PROXIED_PATHS = ['/api', '/checkout', '/panel', '/admin', '/media', '/static']
+
+
+def settings_snapshot():
+    site = SiteSettings.load()
+    return {name: getattr(site, name) for name in PUBLIC_SETTINGS}
+
+
+def asset_urls():
+    """URLs of the bundles and hero video the page links; fingerprinted, so a new build changes them."""
+    urls = [static(name) for name in assets.BUNDLES]
+    urls += [static(source) for sources in assets.BUNDLES.values() for source in sources]
+    manifest = video.manifest(video.HERO_VIDEO)
+    if manifest:
+        urls.append(static(manifest['poster']))
+        urls += [static(rendition['name']) for rendition in manifest['renditions']]
+    else:
+        urls.append(static(video.HERO_VIDEO))
+    return urls
+
+
+def fingerprint(site, origin, signed):
+    digest = hashlib.sha256(json.dumps([site, origin, signed, asset_urls()], sort_keys=True).encode())
+    for name in TEMPLATES:
+        digest.update(get_template(name).template.source.encode())
+    # Inlined into the page rather than linked
+    digest.update(assets.inline_critical_css().encode())
+    return digest.hexdigest()[:16]
+
+
+def render_home():
+    # As an anonymous visitor would see it
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    return views.home(request).content
+
+
+def redirects():
+    # _redirects rules come before netlify.toml's, so this file must not
+    # have any: a catch-all here would shadow the proxy rules
+    return (
+        '# Generated by `manage.py export_static_site` (main/prerender.py).\n'
+        '# The proxy rules and the storefront fallback are in netlify.toml.\n'
+    ).encode()
+
+
+def proxy_rules(origin, signed):
+    rules = [(f'{path}/*', f'{origin}{path}/:splat') for path in PROXIED_PATHS]
+    rules.append(('/checkout', f'{origin}/checkout/'))
+    lines = [RULES_BEGIN]
+    for source, target in rules:
+        lines += ['[[redirects]]', f'  from = "{source}"', f'  to = "{target}"', '  status = 200']
+        if signed:
+            lines.append(f'  signed = "{SIGNING_VARIABLE}"')
+        lines.append('')
+    lines.append(RULES_END)
+    return '\n'.join(lines) + '\n'
+
+
+def netlify_config(current, origin, signed):
+    """``current`` netlify.toml with the proxy rules replaced, or put first: Netlify applies the first match."""
+    rules = proxy_rules(origin, signed)
+    if RULES_BEGIN in current and RULES_END in current:
+        before, rest = current.split(RULES_BEGIN, 1)
+        after = rest.split(RULES_END, 1)[1].lstrip('\n')
+        return (before + rules + '\n' + after).encode()
+    return (rules + '\n' + current).encode()
+
+
+def _write(path, data):
+    """Replace ``path`` atomically if ``data`` differs; returns whether it did."""
+    if path.exists() and path.read_bytes() == data:
+        return False
+    temporary = path.with_name(f'.{path.name}.tmp')
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+    return True
+
+
+def export(out_dir, origin, force=False):
+    """Write the storefront to ``out_dir``; returns ``{'version', 'skipped', 'written': [names]}``."""
+    out_dir = Path(out_dir)
+    origin = origin.rstrip('/')
+    version = catalog.get_version()
+    site = settings_snapshot()
+    signed = bool(settings.STATIC_SITE_PROXY_SECRET)
+    stamp = fingerprint(site, origin, signed)
+
+    snapshot_path = out_dir / SNAPSHOT
+    if not force and snapshot_path.exists():
+        try:
+            previous = json.loads(snapshot_path.read_text(encoding='utf-8'))
+        except ValueError:
+            previous = {}
+        if previous.get('version') == version and previous.get('fingerprint') == stamp:
+            return {'version': version, 'skipped': True, 'written': []}
+
+    # The version the products were built for: if another worker is still
+    # rebuilding, that is the previous one and the next run exports again
+    version, products = catalog.active_products()
+    snapshot = {
+        'version': version,
+        'fingerprint': stamp,
+        'settings': site,
+        'products': [
+            {field: api.product_field_value(product, field) for field in api.DEFAULT_FIELDS}
+            for product in products
+        ],
+    }
+    out_dir.mkdir(parents=True, exist_ok=True)
+    config_path = out_dir / NETLIFY_CONFIG
+    config = config_path.read_text(encoding='utf-8') if config_path.exists() else ''
+    files = {
+        INDEX: render_home(),
+        REDIRECTS: redirects(),
+        NETLIFY_CONFIG: netlify_config(config, origin, signed),
+        # Last, so an interrupted export is retried on the next run
+        SNAPSHOT: (json.dumps(snapshot, indent=1, default=str) + '\n').encode(),
+    }
+    written = [name for name, data in files.items() if _write(out_dir / name, data)]
+    return {'version': version, 'skipped': False, 'written': written}
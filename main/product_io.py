@@ -0,0 +1,333 @@
+"""
+Bulk product import and export keyed on SKU.
+
+A catalog is a CSV file or a JSON list with the columns in FIELDS; the
+``image`` column names a file in an accompanying folder or zip, and an
+empty one keeps the product's current image. Images are stored and their
+variants rendered on a thread pool (Pillow releases the GIL while
+decoding, resizing and encoding), then products are upserted with
+bulk_create/bulk_update. Each stage is timed so a slow import can be
+pinned on the images or on the database.
+"""
+import csv
+import io
+import json
+import mimetypes
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from . import catalog, imaging, storage
+from .models import Product
+
+FIELDS = ['sku', 'name', 'category', 'strain', 'thc', 'price', 'icon', 'description', 'is_active', 'image']
+# Columns an import writes besides the image ones
+PRODUCT_FIELDS = ['name', 'category', 'strain', 'thc', 'price', 'icon', 'description', 'is_active']
+IMAGE_FIELDS = ['image', 'image_hash', 'image_content_type', 'image_variants']
+BATCH_SIZE = 500
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'off'}
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+# --- Reading catalogs and images ---
+
+def read_catalog(fileobj, name):
+    """Parse a ``.csv`` or ``.json`` catalog into a list of row dicts."""
+    extension = os.path.splitext(name)[1].lower()
+    raw = fileobj.read()
+    text = raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw
+    if extension == '.csv':
+        return list(csv.DictReader(io.StringIO(text)))
+    if extension == '.json':
+        rows = json.loads(text)
+        if isinstance(rows, dict):
+            rows = rows.get('products')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError('A JSON catalog must be a list of products')
+        return rows
+    raise ValueError('The catalog must be a .csv or .json file')
+
+
+class FolderImages:
+    def __init__(self, path):
+        self.root = os.path.realpath(path)
+
+    def read(self, name):
+        path = os.path.realpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError('not inside the image folder')
+        if os.path.getsize(path) > MAX_IMAGE_BYTES:
+            raise ValueError('file is too large')
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+class ZipImages:
+    def __init__(self, fileobj):
+        try:
+            self.zip = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile:
+            raise ValueError('The images file is not a valid zip')
+        # Catalogs may name images by their path in the zip or just the file name
+        self.members = {}
+        for info in self.zip.infolist():
+            if not info.is_dir():
+                self.members.setdefault(info.filename, info)
+                self.members.setdefault(os.path.basename(info.filename), info)
+
+    def read(self, name):
+        info = self.members.get(name)
+        if info is None:
+            raise ValueError('not found in the zip')
+        if info.file_size > MAX_IMAGE_BYTES:
+            raise ValueError('file is too large')
+        return self.zip.read(info)
+
+
+def open_images(path):
+    """Image source for a folder or a zip file path."""
+    if os.path.isdir(path):
+        return FolderImages(path)
+    return ZipImages(path)
+
+
+# --- Import ---
+
+def _choice(value, choices, default, field, fail):
+    if not value:
+        return default
+    if value not in dict(choices):
+        fail(f'invalid {field} "{value}"')
+    return value
+
+
+def clean_row(row, number):
+    """Validate one catalog row; raises ValueError naming the row."""
+    def fail(message):
+        raise ValueError(f'Row {number}: {message}')
+
+    values = {field: str(row.get(field) if row.get(field) is not None else '').strip() for field in FIELDS}
+    if not values['sku']:
+        fail('sku is required')
+    if len(values['sku']) > 64:
+        fail('sku is longer than 64 characters')
+    if not values['name']:
+        fail('name is required')
+    try:
+        price = Decimal(values['price'])
+    except InvalidOperation:
+        fail(f'invalid price "{values["price"]}"')
+    if not price.is_finite() or price < 0:
+        fail(f'invalid price "{values["price"]}"')
+    active = values['is_active'].lower()
+    if active and active not in TRUE_VALUES | FALSE_VALUES:
+        fail(f'invalid is_active "{values["is_active"]}"')
+
+    return {
+        'sku': values['sku'],
+        'name': values['name'][:200],
+        'category': _choice(values['category'], Product.CATEGORY_CHOICES, 'flower', 'category', fail),
+        'strain': _choice(values['strain'], Product.STRAIN_CHOICES, 'hybrid', 'strain', fail),
+        'thc': values['thc'][:50],
+        'price': price.quantize(Decimal('0.01')),
+        'icon': values['icon'][:10] or '🌿',
+        'description': values['description'],
+        'is_active': active not in FALSE_VALUES if active else True,
+        'image': values['image'],
+    }
+
+
+def _ingest_image(images, name, known_variants):
+    image_hash = storage.save_image(images.read(name))
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    variants = known_variants.get(image_hash)
+    if variants is None:
+        try:
+            variants = imaging.generate_variants(image_hash)
+        except (OSError, Image.DecompressionBombError):
+            # Same as Product.set_image: serve the original as uploaded
+            variants = {}
+    return image_hash, content_type, variants
+
+
+def _process_images(names, images, workers, report):
+    results = {}
+    if not names:
+        return results
+    if images is None:
+        report['errors'].extend(f'Image {name}: no image folder or zip was given' for name in names)
+        return results
+    # Re-imports of unchanged images only cost a hash
+    known_variants = dict(
+        Product.objects.exclude(image_hash__isnull=True).exclude(image_variants={})
+        .values_list('image_hash', 'image_variants')
+    )
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as pool:
+        futures = {name: pool.submit(_ingest_image, images, name, known_variants) for name in names}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                report['errors'].append(f'Image {name}: {e}')
+    report['images'] = len(results)
+    return results
+
+
+def import_products(rows, images=None, workers=None):
+    """Upsert catalog rows by SKU and return a report of counts, errors and stage timings.
+
+    Rows that fail validation, or whose image can't be read, are skipped
+    and listed in ``report['errors']``; everything else is written.
+    """
+    report = {'created': 0, 'updated': 0, 'unchanged': 0, 'images': 0, 'errors': [], 'timings': {}}
+    clock = [time.perf_counter()]
+
+    def lap(stage):
+        now = time.perf_counter()
+        report['timings'][stage] = now - clock[0]
+        clock[0] = now
+
+    cleaned = {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            item = clean_row(row, number)
+        except ValueError as e:
+            report['errors'].append(str(e))
+            continue
+        if item['sku'] in cleaned:
+            report['errors'].append(f'Row {number}: duplicate sku "{item["sku"]}"')
+            continue
+        cleaned[item['sku']] = item
+    lap('validate')
+
+    names = sorted({item['image'] for item in cleaned.values() if item['image']})
+    image_results = _process_images(names, images, workers or default_workers(), report)
+    lap('images')
+
+    skus = list(cleaned)
+    existing = {}
+    for start in range(0, len(skus), BATCH_SIZE):
+        existing.update(
+            (product.sku, product)
+            for product in Product.objects.filter(sku__in=skus[start:start + BATCH_SIZE]).defer('image')
+        )
+
+    now = timezone.now()
+    to_create, to_update, to_update_images, released = [], [], [], []
+    for sku, item in cleaned.items():
+        if item['image'] and item['image'] not in image_results:
+            continue
+        product = existing.get(sku) or Product(sku=sku)
+        changed = False
+        for field in PRODUCT_FIELDS:
+            if getattr(product, field) != item[field]:
+                setattr(product, field, item[field])
+                changed = True
+        image_changed = False
+        if item['image']:
+            image_hash, content_type, variants = image_results[item['image']]
+            if product.image_hash != image_hash:
+                if product.image_hash:
+                    released.append(product.image_hash)
+                product.image = None
+                product.image_hash = image_hash
+                product.image_content_type = content_type
+                product.image_variants = variants
+                image_changed = True
+
+        if product.pk is None:
+            to_create.append(product)
+        elif image_changed:
+            product.updated_at = now
+            to_update_images.append(product)
+        elif changed:
+            product.updated_at = now
+            to_update.append(product)
+        else:
+            report['unchanged'] += 1
+
+    with transaction.atomic():
+        Product.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        # Split so unchanged images never touch the deferred legacy column
+        Product.objects.bulk_update(to_update, PRODUCT_FIELDS + ['updated_at'], batch_size=BATCH_SIZE)
+        Product.objects.bulk_update(to_update_images, PRODUCT_FIELDS + IMAGE_FIELDS + ['updated_at'], batch_size=BATCH_SIZE)
+    report['created'] = len(to_create)
+    report['updated'] = len(to_update) + len(to_update_images)
+    lap('upsert')
+
+    for image_hash in set(released):
+        storage.release_image(image_hash)
+    if to_create or to_update or to_update_images:
+        # Bulk writes bypass the Product signals
+        catalog.bump_version()
+    lap('cleanup')
+    report['timings']['total'] = sum(report['timings'].values())
+    return report
+
+
+# --- Export ---
+
+def image_filename(product):
+    """Name of the product's image in an export, based on its SKU."""
+    if not product.image_hash:
+        return ''
+    extension = mimetypes.guess_extension(product.image_content_type or '') or ''
+    return re.sub(r'[^\w.-]', '_', product.sku or product.default_sku()) + extension
+
+
+def export_rows():
+    """Yield one FIELDS dict per product, in id order."""
+    products = Product.objects.defer('image').order_by('id').iterator(chunk_size=BATCH_SIZE)
+    for product in products:
+        yield {
+            'sku': product.sku or product.default_sku(),
+            'name': product.name,
+            'category': product.category,
+            'strain': product.strain,
+            'thc': product.thc or '',
+            'price': str(product.price),
+            'icon': product.icon,
+            'description': product.description,
+            'is_active': 'true' if product.is_active else 'false',
+            'image': image_filename(product),
+        }
+
+
+def write_catalog(out, export_format):
+    """Write every product to the text file ``out`` as CSV or JSON."""
+    if export_format == 'csv':
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(export_rows())
+    elif export_format == 'json':
+        out.write('[')
+        for i, row in enumerate(export_rows()):
+            out.write((',\n' if i else '\n') + json.dumps(row, ensure_ascii=False))
+        out.write('\n]\n')
+    else:
+        raise ValueError('Invalid format')
+
+
+def write_images_zip(path):
+    """Zip every product image under its export file name; returns the count."""
+    count = 0
+    with zipfile.ZipFile(path, 'w') as archive:
+        products = Product.objects.exclude(image_hash__isnull=True).exclude(image_hash='')
+        for product in products.only('id', 'sku', 'image_hash', 'image_content_type').iterator(chunk_size=BATCH_SIZE):
+            with storage.open_image(product.image_hash) as f:
+                # Already-compressed image formats gain nothing from deflate
+                archive.writestr(image_filename(product), f.read(), compress_type=zipfile.ZIP_STORED)
+            count += 1
+    return count
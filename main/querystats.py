@@ -0,0 +1,84 @@
+"""
+Per-request SQL counts and timings.
+
+The backends in queueblaze/db/ pass every query through execute_wrapper,
+which does nothing unless a Recorder is active in the current context
+(the request, including sync_to_async calls made from it). The
+instrumentation middleware in main/middleware.py starts one for a sample
+of requests (QUERY_STATS_SAMPLE_RATE) and turns it into a Server-Timing
+header and log lines for slow requests and repeated queries.
+
+Views can declare how many queries they are expected to run with
+``@query_budget(n)``. Going over is logged, or raises QueryBudgetExceeded
+when QUERY_BUDGET_ENFORCE is on (tests).
+"""
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar('querystats_recorder', default=None)
+
+# Parameter lists of any length count as the same query
+IN_LIST_PATTERN = re.compile(r'\((?:%s, )+%s\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class Recorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._by_sql = {}
+        self._lock = threading.Lock()
+
+    def add(self, sql, seconds):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self._by_sql[sql] = self._by_sql.get(sql, 0) + 1
+
+    def repeated(self, threshold):
+        """``[(sql, count)]`` of query shapes run at least ``threshold`` times, most first."""
+        with self._lock:
+            shapes = {}
+            for sql, count in self._by_sql.items():
+                shape = IN_LIST_PATTERN.sub('(...)', sql)
+                shapes[shape] = shapes.get(shape, 0) + count
+        return sorted(
+            ((sql, count) for sql, count in shapes.items() if count >= threshold),
+            key=lambda item: -item[1],
+        )
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.add(sql, time.perf_counter() - started)
+
+
+@contextmanager
+def record():
+    """Record the queries run in this context: ``with record() as queries: ...``."""
+    recorder = Recorder()
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+def query_budget(limit):
+    """Declare that a view runs at most ``limit`` queries per request."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
@@ -0,0 +1,190 @@
+"""
+Sliding-window rate limiting shared by all workers.
+
+With the Redis cache configured (REDIS_URL) each limit is a sorted set of
+hit timestamps, trimmed and checked in a single Lua script so concurrent
+requests can't both slip under the limit, and timed by the Redis clock so
+workers on different machines agree. Without Redis (local development,
+tests), or while Redis is unreachable, the same window is kept in process
+memory.
+
+Views opt in with the ``rate_limit`` decorator, which answers 429 with a
+Retry-After header once a client goes over the limit.
+
+Clients are told apart by address (client_ip). Storefront requests
+proxied by Netlify pass one proxy more than direct ones; that hop is only
+trusted on requests carrying Netlify's signature (X-Nf-Sign), or anyone
+could pick their own address by sending X-Forwarded-For.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque, namedtuple
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+TOO_MANY_REQUESTS = {'success': False, 'error': 'Too many requests. Please try again later.'}
+
+Result = namedtuple('Result', ['allowed', 'remaining', 'retry_after'])
+
+# KEYS[1] = window key; ARGV = limit, window (ms), unique member
+SLIDING_WINDOW_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {1, limit - count - 1, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, 0, tonumber(oldest[2]) + window - now}
+"""
+
+_script = None
+
+_local_hits = {}
+_local_lock = threading.Lock()
+LOCAL_MAX_KEYS = 10000
+
+
+def _redis_alias():
+    # The shared tier behind the default cache (see settings.CACHES), if any
+    for alias, config in settings.CACHES.items():
+        if config['BACKEND'].startswith('django_redis'):
+            return alias
+    return None
+
+
+def _hit_redis(alias, key, limit, window):
+    global _script
+    if _script is None:
+        from django_redis import get_redis_connection
+        _script = get_redis_connection(alias).register_script(SLIDING_WINDOW_SCRIPT)
+    allowed, remaining, retry_after_ms = _script(
+        keys=[caches[alias].make_key(key)], args=[limit, int(window * 1000), uuid.uuid4().hex],
+    )
+    return Result(bool(allowed), int(remaining), int(retry_after_ms) / 1000)
+
+
+def _hit_local(key, limit, window):
+    now = time.monotonic()
+    with _local_lock:
+        if len(_local_hits) > LOCAL_MAX_KEYS:
+            # Drop clients whose windows have fully expired
+            for stale in [k for k, hits in _local_hits.items() if not hits or hits[-1] <= now - window]:
+                del _local_hits[stale]
+        hits = _local_hits.setdefault(key, deque())
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if len(hits) < limit:
+            hits.append(now)
+            return Result(True, limit - len(hits), 0)
+        return Result(False, 0, hits[0] + window - now)
+
+
+def hit(name, ident, limit, window):
+    """Record a hit for ``ident`` on limit ``name``; at most ``limit`` per ``window`` seconds."""
+    key = f'ratelimit:{name}:{ident}'
+    alias = _redis_alias()
+    if alias is None:
+        return _hit_local(key, limit, window)
+    try:
+        return _hit_redis(alias, key, limit, window)
+    except Exception:
+        # A Redis outage must not take checkout down with it; limit per process until it's back
+        logger.warning('Rate limit check for %s failed; using the in-process window', name, exc_info=True)
+        return _hit_local(key, limit, window)
+
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+
+def signed_by_netlify(request):
+    """Whether the request carries a valid X-Nf-Sign token (HS256, STATIC_SITE_PROXY_SECRET)."""
+    secret = settings.STATIC_SITE_PROXY_SECRET
+    token = request.META.get('HTTP_X_NF_SIGN')
+    if not secret or not token:
+        return False
+    try:
+        header, payload, signature = token.split('.')
+        expected = hmac.new(secret.encode(), f'{header}.{payload}'.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(_b64decode(signature), expected):
+            return False
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return False
+    return isinstance(claims, dict) and claims.get('iss') == 'netlify' and claims.get('exp', math.inf) > time.time()
+
+
+def client_ip(request):
+    """The client address, trusting RATE_LIMIT_PROXY_COUNT proxies in X-Forwarded-For.
+
+    Plus Netlify's, on requests it signed.
+    """
+    proxies = settings.RATE_LIMIT_PROXY_COUNT
+    if proxies and signed_by_netlify(request):
+        proxies += 1
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and proxies:
+        # Each trusted proxy appends the address it saw; anything further
+        # left was sent by the client and can be forged
+        addresses = [a.strip() for a in forwarded.split(',')]
+        return addresses[-min(proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', 'unknown')
+
+
+def _too_many_requests(request):
+    return JsonResponse(TOO_MANY_REQUESTS, status=429)
+
+
+def rate_limit(name, limit, window, key=client_ip, methods=('POST',), limited_response=_too_many_requests):
+    """Allow ``limit`` requests per ``window`` seconds per ``key(request)``.
+
+    Only ``methods`` count towards the limit. Over the limit the view is not
+    called; ``limited_response(request)`` is returned with a Retry-After
+    header instead (a JSON 429 by default). Works on sync and async views.
+    """
+    def limited(request, result):
+        metrics.RATE_LIMITED.labels(name).inc()
+        response = limited_response(request)
+        response['Retry-After'] = str(max(1, math.ceil(result.retry_after)))
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    result = await sync_to_async(hit, thread_sensitive=False)(name, key(request), limit, window)
+                    if not result.allowed:
+                        return limited(request, result)
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    result = hit(name, key(request), limit, window)
+                    if not result.allowed:
+                        return limited(request, result)
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,256 @@
+"""
+Daily sales rollups for the admin dashboard.
+
+SalesRollup keeps one row per (day, dimension, key) with order, unit and
+revenue totals by status, product and category. A refresh rebuilds a day
+from its orders as a whole (an index range scan on created_at), which
+keeps status changes and deletions correct without tracking deltas.
+
+New orders are only added on top of their day's rows (add_orders(), from
+main/signals.py for checkout and main/ingest.py for batched inserts), so
+placing an order costs a few row updates rather than a rebuild. Status
+changes and deletions refresh the order's day.
+
+Order.in_rollups records which orders the rows count as they are now. It
+starts false and every save clears it; a refresh or add_orders() claims
+the orders it counts by setting it, so an order is counted once however
+the two overlap, and whatever a failed update leaves unclaimed is found
+by the refresh_sales_rollups command through a partial index. Writers of
+a day hold a PostgreSQL advisory lock on it until they commit.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+DASHBOARD_CACHE_KEY = 'dashboard:stats'
+TOP_PRODUCTS = 5
+# First key of the per-day advisory locks, to keep clear of other users
+DAY_LOCK_CLASS = 0x5a1e5
+
+
+def day_bounds(day):
+    """Aware [start, end) datetimes of a local calendar day."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def _line_revenue():
+    return ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _lock_days(days):
+    """Hold the rollup locks of ``days`` until the transaction ends (PostgreSQL only)."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for day in sorted(set(days)):
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [DAY_LOCK_CLASS, day.toordinal()])
+
+
+def _day_rows(day, refreshed_at):
+    from .models import Order, OrderItem, Product, SalesRollup
+    start, end = day_bounds(day)
+    # Orders created since the claim are left to their own add_orders()
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end, in_rollups=True).order_by()
+    items = OrderItem.objects.filter(created_at__gte=start, created_at__lt=end, order__in_rollups=True).order_by()
+    # Cancelled orders count towards their status but not product sales
+    sold = items.exclude(order__status='cancelled')
+
+    def row(dimension, key, label, orders, units, revenue):
+        return SalesRollup(
+            day=day, dimension=dimension, key=key or '', label=label or '',
+            orders=orders, units=units or 0, revenue=revenue or Decimal('0'),
+            refreshed_at=refreshed_at,
+        )
+
+    status_labels = dict(Order.STATUS_CHOICES)
+    status_units = dict(items.values_list('order__status').annotate(units=Sum('quantity')))
+    rows = [
+        row('status', status, status_labels.get(status, status), n, status_units.get(status), revenue)
+        for status, n, revenue in orders.values_list('status').annotate(n=Count('id'), revenue=Sum('total_amount'))
+    ]
+    rows += [
+        row('product', str(product_id) if product_id else '', name, n, units, revenue)
+        for product_id, name, n, units, revenue in sold.values_list('product_id').annotate(
+            name=Max('product_name'), n=Count('order', distinct=True),
+            units=Sum('quantity'), revenue=Sum(_line_revenue()),
+        ).values_list('product_id', 'name', 'n', 'units', 'revenue')
+    ]
+    category_labels = dict(Product.CATEGORY_CHOICES)
+    rows += [
+        row('category', category, category_labels.get(category, 'Deleted products'), n, units, revenue)
+        for category, n, units, revenue in sold.values_list('product__category').annotate(
+            n=Count('order', distinct=True), units=Sum('quantity'), revenue=Sum(_line_revenue()),
+        )
+    ]
+    return rows
+
+
+def refresh_days(days):
+    """Rebuild the rollup rows of each local day in ``days``."""
+    from .models import Order, SalesRollup
+    for day in sorted(set(days)):
+        refreshed_at = timezone.now()
+        start, end = day_bounds(day)
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    _lock_days([day])
+                    Order.objects.filter(created_at__gte=start, created_at__lt=end, in_rollups=False).update(in_rollups=True)
+                    SalesRollup.objects.filter(day=day).delete()
+                    SalesRollup.objects.bulk_create(_day_rows(day, refreshed_at))
+                break
+            except IntegrityError:
+                # A concurrent refresh of the same day committed first; redo on top of it
+                if attempt:
+                    raise
+    cache.delete(DASHBOARD_CACHE_KEY)
+
+
+def refresh_orders(orders):
+    """Refresh the days of the given orders, if rollups are maintained on save."""
+    if settings.SALES_ROLLUP_ON_SAVE:
+        refresh_days(timezone.localdate(order.created_at) for order in orders)
+
+
+def _add_to_row(day, dimension, key, label, orders, units, revenue):
+    from .models import SalesRollup
+    rows = SalesRollup.objects.filter(day=day, dimension=dimension, key=key)
+    totals = {'orders': F('orders') + orders, 'units': F('units') + units, 'revenue': F('revenue') + revenue}
+    if rows.update(**totals):
+        return
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(
+                day=day, dimension=dimension, key=key, label=label,
+                orders=orders, units=units, revenue=revenue,
+            )
+    except IntegrityError:
+        # Another order created the row first
+        rows.update(**totals)
+
+
+def add_orders(orders):
+    """Add newly created ``orders`` to their days' rows, if rollups are maintained on save.
+
+    The orders' items must be committed. Orders a refresh (or an earlier
+    call) already counted are skipped. Only status changes and deletions
+    need their day refreshed.
+    """
+    from .models import Order
+    if not settings.SALES_ROLLUP_ON_SAVE or not orders:
+        return
+    with transaction.atomic():
+        _lock_days(timezone.localdate(order.created_at) for order in orders)
+        # Counted as they are in the database; a save that lands after this
+        # waits for the commit, then marks its order for a refresh again
+        claimed = list(
+            Order.objects.filter(id__in=[order.id for order in orders], in_rollups=False)
+            .select_for_update().order_by('id').only('id', 'status', 'total_amount', 'created_at')
+        )
+        if claimed:
+            Order.objects.filter(id__in=[order.id for order in claimed]).update(in_rollups=True)
+            _add_claimed(claimed)
+    cache.delete(DASHBOARD_CACHE_KEY)
+
+
+def _add_claimed(orders):
+    from .models import Order, OrderItem, Product
+    by_id = {order.id: order for order in orders}
+    status_labels = dict(Order.STATUS_CHOICES)
+    category_labels = dict(Product.CATEGORY_CHOICES)
+    # (day, dimension, key) -> [label, order ids, units, revenue]
+    totals = defaultdict(lambda: [None, set(), 0, Decimal('0')])
+
+    def add(order, dimension, key, label, units, revenue):
+        row = totals[timezone.localdate(order.created_at), dimension, key or '']
+        row[0] = label or ''
+        row[1].add(order.id)
+        row[2] += units
+        row[3] += revenue
+
+    units_by_order = defaultdict(int)
+    items = OrderItem.objects.filter(order_id__in=by_id).values_list(
+        'order_id', 'product_id', 'product_name', 'product__category', 'quantity', 'unit_price',
+    )
+    for order_id, product_id, name, category, quantity, unit_price in items:
+        order = by_id[order_id]
+        units_by_order[order_id] += quantity
+        # Cancelled orders count towards their status but not product sales
+        if order.status == 'cancelled':
+            continue
+        add(order, 'product', str(product_id) if product_id else '', name, quantity, quantity * unit_price)
+        add(order, 'category', category, category_labels.get(category, 'Deleted products'),
+            quantity, quantity * unit_price)
+    for order in orders:
+        add(order, 'status', order.status, status_labels.get(order.status, order.status),
+            units_by_order[order.id], order.total_amount)
+
+    for (day, dimension, key), (label, order_ids, units, revenue) in sorted(totals.items()):
+        _add_to_row(day, dimension, key, label, len(order_ids), units, revenue)
+
+
+def refresh_since(since=None, full=False):
+    """Refresh every day with orders updated since ``since`` (default: orders the rollups miss).
+
+    Returns the number of days refreshed. A full refresh rebuilds every day
+    and drops rows of days that no longer have orders.
+    """
+    from .models import Order, SalesRollup
+    orders = Order.objects.order_by()
+    if since is not None and not full:
+        orders = orders.filter(updated_at__gte=since)
+    elif not full:
+        orders = orders.filter(in_rollups=False)
+    days = set(orders.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct())
+    if full:
+        SalesRollup.objects.exclude(day__in=days).delete()
+    refresh_days(days)
+    return len(days)
+
+
+def _build_dashboard_stats():
+    from .models import Product, SalesRollup
+    today = timezone.localdate()
+    week = today - timedelta(days=6)
+    month = today - timedelta(days=29)
+    not_cancelled = ~Q(key='cancelled')
+    zero = Decimal('0')
+
+    # One pass over the per-day status rows yields every headline number
+    stats = SalesRollup.objects.filter(dimension='status').aggregate(
+        total_orders=Sum('orders', default=0),
+        pending_orders=Sum('orders', filter=Q(key='pending'), default=0),
+        orders_today=Sum('orders', filter=Q(day=today), default=0),
+        revenue_today=Sum('revenue', filter=Q(day=today) & not_cancelled, default=zero),
+        revenue_week=Sum('revenue', filter=Q(day__gte=week) & not_cancelled, default=zero),
+        revenue_month=Sum('revenue', filter=Q(day__gte=month) & not_cancelled, default=zero),
+        units_month=Sum('units', filter=Q(day__gte=month) & not_cancelled, default=0),
+    )
+    stats.update(Product.objects.aggregate(
+        total_products=Count('id'),
+        active_products=Count('id', filter=Q(is_active=True)),
+    ))
+    stats['top_products'] = list(
+        SalesRollup.objects.filter(dimension='product', day__gte=month)
+        .values('key').annotate(label=Max('label'), units=Sum('units'), revenue=Sum('revenue'))
+        .order_by('-revenue')[:TOP_PRODUCTS]
+    )
+    return stats
+
+
+def dashboard_stats():
+    """Headline numbers for the admin dashboard, cached for DASHBOARD_CACHE_TIMEOUT seconds."""
+    stats = cache.get(DASHBOARD_CACHE_KEY)
+    if stats is None:
+        stats = _build_dashboard_stats()
+        cache.set(DASHBOARD_CACHE_KEY, stats, settings.DASHBOARD_CACHE_TIMEOUT)
+    return stats
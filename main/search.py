@@ -0,0 +1,140 @@
+"""
+Server-side product search with facet counts.
+
+On PostgreSQL text search uses a GIN-indexed tsvector over name and
+description plus trigram similarity on the name for typos (indexes are
+created in migration 0007). Other databases, i.e. SQLite in local
+development, fall back to case-insensitive substring matching.
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, Q
+
+from .models import Product
+
+SEARCH_CONFIG = 'english'
+DEFAULT_LIMIT = 24
+
+# (label, min inclusive, max exclusive) in Rand
+PRICE_RANGES = [
+    ('under-100', None, Decimal('100')),
+    ('100-250', Decimal('100'), Decimal('250')),
+    ('250-500', Decimal('250'), Decimal('500')),
+    ('500-plus', Decimal('500'), None),
+]
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+    # Must match the expression indexed in migration 0007
+    return SearchVector('name', 'description', config=SEARCH_CONFIG)
+
+
+def price_bounds(price_range=None, min_price=None, max_price=None):
+    """Resolve a named PRICE_RANGES bucket or explicit bounds to Decimals."""
+    if price_range:
+        for label, low, high in PRICE_RANGES:
+            if label == price_range:
+                return low, high
+        raise ValueError('Invalid price range')
+    try:
+        return (
+            Decimal(min_price) if min_price else None,
+            Decimal(max_price) if max_price else None,
+        )
+    except ArithmeticError:
+        raise ValueError('Invalid price')
+
+
+def _price_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def _text_filter(queryset, text):
+    if not text:
+        return queryset
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        # name % text (pg_trgm.similarity_threshold, 0.3 by default) can use the
+        # trigram index; similarity() itself is only computed to rank the matches
+        return queryset.annotate(
+            search=search_vector(),
+            rank=SearchRank(search_vector(), query),
+            similarity=TrigramSimilarity('name', text),
+        ).filter(Q(search=query) | Q(name__trigram_similar=text))
+    return queryset.filter(Q(name__icontains=text) | Q(description__icontains=text))
+
+
+def _strain_count(strains, value):
+    # What filtering by ``value`` returns, 'all' meaning no strain filter
+    if value == 'all':
+        return sum(strains.values())
+    return strains.get(value, 0) + strains.get('all', 0)
+
+
+def search_products(text='', category=None, strain=None, min_price=None, max_price=None,
+                    limit=DEFAULT_LIMIT, offset=0, only=None):
+    """Return ``{'total', 'products', 'facets'}`` for the given filters.
+
+    Each facet is counted with every filter applied except its own, so the
+    counts show what selecting another value of that facet would return.
+    """
+    base = _text_filter(Product.objects.filter(is_active=True), text.strip())
+    category_q = Q(category=category) if category else Q()
+    # Products of strain 'all' suit every strain, as the storefront filter always had it
+    strain_q = Q(strain__in=[strain, 'all']) if strain and strain != 'all' else Q()
+    price_q = _price_q(min_price, max_price)
+
+    matches = base.filter(category_q & strain_q & price_q)
+    if text and connection.vendor == 'postgresql':
+        matches = matches.order_by('-rank', '-similarity', '-created_at', '-id')
+    else:
+        matches = matches.order_by('-created_at', '-id')
+    if only:
+        matches = matches.only(*only)
+    else:
+        matches = matches.defer('image')
+
+    categories = dict(
+        base.filter(strain_q & price_q).order_by()
+        .values_list('category').annotate(n=Count('id'))
+    )
+    strains = dict(
+        base.filter(category_q & price_q).order_by()
+        .values_list('strain').annotate(n=Count('id'))
+    )
+    price_counts = base.filter(category_q & strain_q).aggregate(**{
+        f'price_{i}': Count('id', filter=_price_q(low, high))
+        for i, (label, low, high) in enumerate(PRICE_RANGES)
+    })
+
+    return {
+        'total': matches.count(),
+        'products': list(matches[offset:offset + limit]),
+        'facets': {
+            'category': [
+                {'value': value, 'label': label, 'count': categories.get(value, 0)}
+                for value, label in Product.CATEGORY_CHOICES
+            ],
+            'strain': [
+                {'value': value, 'label': label, 'count': _strain_count(strains, value)}
+                for value, label in Product.STRAIN_CHOICES
+            ],
+            'price': [
+                {
+                    'value': label,
+                    'min': str(low) if low is not None else None,
+                    'max': str(high) if high is not None else None,
+                    'count': price_counts[f'price_{i}'],
+                }
+                for i, (label, low, high) in enumerate(PRICE_RANGES)
+            ],
+        },
+    }
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog, rollups
+from .models import Order, Product, SiteSettings
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_catalog_version(sender, **kwargs):
+    # Wait for the commit so no worker rebuilds the cache from uncommitted rows
+    transaction.on_commit(catalog.bump_version)
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def clear_site_settings_cache(sender, **kwargs):
+    transaction.on_commit(SiteSettings.clear_cache)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def refresh_sales_rollups(sender, instance, created=False, **kwargs):
+    # After commit, so the order's items are in place; a failure is logged
+    # and left for the refresh_sales_rollups command to catch up on. A new
+    # order is only added to the totals; changes rebuild its day
+    update = rollups.add_orders if created else rollups.refresh_orders
+    transaction.on_commit(lambda: update([instance]), robust=True)
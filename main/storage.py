@@ -0,0 +1,74 @@
+"""
+Content-addressed blob store for product images.
+
+Image bytes live in a Django Storage backend under ``products/<sha256>``
+instead of being base64-encoded into the ``Product`` row, so catalog
+queries only move small metadata rows. Identical uploads share a blob.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+
+IMAGE_PREFIX = 'products'
+
+
+def get_storage():
+    """Return the storage backend used for product images.
+
+    Defaults to the ``default`` alias (MEDIA_ROOT on disk); point
+    ``PRODUCT_IMAGE_STORAGE`` at another ``STORAGES`` alias to use S3 etc.
+    """
+    return storages[getattr(settings, 'PRODUCT_IMAGE_STORAGE', 'default')]
+
+
+def image_key(image_hash):
+    return f'{IMAGE_PREFIX}/{image_hash}'
+
+
+def save_image(data):
+    """Store image bytes (or an uploaded file) and return their SHA-256 hex key."""
+    if hasattr(data, 'chunks'):
+        digest = hashlib.sha256()
+        chunks = []
+        for chunk in data.chunks():
+            digest.update(chunk)
+            chunks.append(chunk)
+        data = b''.join(chunks)
+        image_hash = digest.hexdigest()
+    else:
+        image_hash = hashlib.sha256(data).hexdigest()
+
+    storage = get_storage()
+    key = image_key(image_hash)
+    # Content-addressed: an existing blob with this key already holds these bytes
+    if not storage.exists(key):
+        name = storage.save(key, ContentFile(data))
+        if name != key:
+            # Lost a race with a concurrent upload of the same bytes
+            storage.delete(name)
+    return image_hash
+
+
+def open_image(image_hash):
+    return get_storage().open(image_key(image_hash), 'rb')
+
+
+def image_exists(image_hash):
+    return get_storage().exists(image_key(image_hash))
+
+
+def release_image(image_hash, exclude_id=None):
+    """Delete a blob once no product references it any more."""
+    if not image_hash:
+        return
+    from .models import Product
+
+    others = Product.objects.filter(image_hash=image_hash)
+    if exclude_id is not None:
+        others = others.exclude(id=exclude_id)
+    if not others.exists():
+        from .imaging import delete_variants
+        get_storage().delete(image_key(image_hash))
+        delete_variants(image_hash)
@@ -0,0 +1,181 @@
+"""
+Seeded synthetic catalog and order history for benchmarks.
+
+The same seed always produces the same products, images and orders, so
+benchmark runs on different machines or databases start from identical
+data. Products go through the regular bulk import (main/product_io.py),
+which stores the generated images and renders their variants; orders and
+their items are bulk inserted with timestamps spread over the past days,
+and the sales rollups are rebuilt afterwards.
+
+Synthetic products have SKUs starting with SKU_PREFIX and synthetic
+customers use the EMAIL_DOMAIN domain. Seed an empty database: products
+are upserted by SKU, but every run adds new orders.
+"""
+import colorsys
+import io
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from . import catalog, product_io, rollups
+from .models import Order, OrderItem, Product
+
+SKU_PREFIX = 'SYN-'
+EMAIL_DOMAIN = 'example.test'
+BATCH_SIZE = 1000
+IMAGE_SIZE = 800
+
+ADJECTIVES = [
+    'Amber', 'Blue', 'Cosmic', 'Desert', 'Electric', 'Frosted', 'Golden', 'Hazy', 'Island', 'Jade',
+    'Kinetic', 'Lunar', 'Midnight', 'Northern', 'Orange', 'Purple', 'Quiet', 'Royal', 'Solar', 'Velvet',
+]
+NOUNS = [
+    'Haze', 'Kush', 'Dream', 'Cookies', 'Diesel', 'Glue', 'Sherbet', 'Runtz', 'Gelato', 'Widow',
+    'Skunk', 'Cake', 'Breath', 'Lemon', 'Mango', 'Berry', 'Candy', 'Cheese', 'Thunder', 'Express',
+]
+FIRST_NAMES = ['Thabo', 'Lerato', 'Sipho', 'Anele', 'Johan', 'Megan', 'Pieter', 'Zanele', 'Ayesha', 'Ruan']
+LAST_NAMES = ['Nkosi', 'Dlamini', 'van der Merwe', 'Botha', 'Naidoo', 'Mokoena', 'Smith', 'Pillay', 'Khumalo']
+CITIES = [
+    ('Cape Town', 'Western Cape', '8001'), ('Johannesburg', 'Gauteng', '2001'),
+    ('Durban', 'KwaZulu-Natal', '4001'), ('Pretoria', 'Gauteng', '0002'),
+    ('Gqeberha', 'Eastern Cape', '6001'),
+]
+# Most orders are old enough to have been fulfilled
+STATUS_WEIGHTS = {'delivered': 60, 'shipped': 12, 'processing': 8, 'pending': 12, 'cancelled': 8}
+ICONS = {'flower': '🌿', 'edibles': '🍪', 'concentrates': '💎', 'accessories': '🔥'}
+
+
+class SyntheticImages:
+    """Image source for product_io: renders ``img-<n>.jpg`` on demand, the same bytes every time."""
+
+    def read(self, name):
+        number = int(name.split('-')[1].split('.')[0])
+        rng = random.Random(number)
+        image = Image.new('RGB', (IMAGE_SIZE, IMAGE_SIZE))
+        draw = ImageDraw.Draw(image)
+        hue = rng.random()
+        # A gradient with a few shapes, so the encoders have real work to do
+        for y in range(0, IMAGE_SIZE, 4):
+            r, g, b = colorsys.hsv_to_rgb(hue, 0.6, 0.35 + 0.6 * y / IMAGE_SIZE)
+            draw.rectangle([0, y, IMAGE_SIZE, y + 4], fill=(int(r * 255), int(g * 255), int(b * 255)))
+        for _ in range(12):
+            x, y, size = rng.randrange(IMAGE_SIZE), rng.randrange(IMAGE_SIZE), rng.randrange(40, 240)
+            r, g, b = colorsys.hsv_to_rgb((hue + rng.random() / 3) % 1, 0.5, 0.9)
+            draw.ellipse([x, y, x + size, y + size], fill=(int(r * 255), int(g * 255), int(b * 255)))
+        out = io.BytesIO()
+        image.save(out, 'JPEG', quality=85)
+        return out.getvalue()
+
+
+def product_rows(count, images, seed):
+    """Catalog rows (product_io.FIELDS) for ``count`` products sharing ``images`` distinct images."""
+    rng = random.Random(seed)
+    categories = [key for key, _ in Product.CATEGORY_CHOICES]
+    strains = [key for key, _ in Product.STRAIN_CHOICES]
+    rows = []
+    for n in range(count):
+        category = rng.choice(categories)
+        rows.append({
+            'sku': f'{SKU_PREFIX}{n:06d}',
+            'name': f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} #{n}',
+            'category': category,
+            'strain': rng.choice(strains),
+            'thc': f'{rng.randint(12, 28)}%' if category != 'accessories' else '',
+            'price': str(Decimal(rng.randrange(5000, 150000)) / 100),
+            'icon': ICONS.get(category, '🌿'),
+            'description': f'Synthetic product {n} for benchmarks.',
+            # A few inactive products, as in a real catalog
+            'is_active': 'false' if rng.random() < 0.05 else 'true',
+            'image': f'img-{n % images}.jpg' if images else '',
+        })
+    return rows
+
+
+@contextmanager
+def _explicit_created_at():
+    # auto_now_add would stamp every generated order with the current time
+    field = Order._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def _order(rng, number, created_at, products):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    city, province, postal_code = rng.choice(CITIES)
+    delivery_type = 'pickup' if rng.random() < 0.2 else 'delivery'
+    order = Order(
+        first_name=first,
+        last_name=last,
+        customer_email=f'customer{number}@{EMAIL_DOMAIN}',
+        customer_phone=f'0{rng.randint(60, 84)}{rng.randint(1000000, 9999999)}',
+        delivery_type=delivery_type,
+        shipping_option='' if delivery_type == 'pickup' else rng.choice(list(Order.SHIPPING_PRICES)),
+        address_street=f'{rng.randint(1, 200)} Main Road' if delivery_type == 'delivery' else '',
+        address_city=city if delivery_type == 'delivery' else '',
+        address_province=province if delivery_type == 'delivery' else '',
+        address_postal_code=postal_code if delivery_type == 'delivery' else '',
+        payment_method=rng.choice([key for key, _ in Order.PAYMENT_METHOD_CHOICES]),
+        items_json='[]',
+        status=rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0],
+        created_at=created_at,
+    )
+    items = [
+        OrderItem(product_id=product_id, product_name=name, quantity=rng.randint(1, 3),
+                  unit_price=price, created_at=created_at)
+        for product_id, name, price in rng.sample(products, k=min(len(products), rng.randint(1, 4)))
+    ]
+    order.apply_totals(items)
+    return order, items
+
+
+def seed_orders(count, days, seed, progress=None):
+    """Bulk insert ``count`` orders spread evenly over the last ``days`` days; returns the item count."""
+    products = list(Product.objects.filter(is_active=True).order_by('id').values_list('id', 'name', 'price'))
+    if not products:
+        raise ValueError('Seed some active products first')
+    rng = random.Random(seed)
+    now = timezone.now()
+    span = timedelta(days=days).total_seconds()
+    items_created = 0
+    with _explicit_created_at():
+        for start in range(0, count, BATCH_SIZE):
+            batch = []
+            for number in range(start, min(count, start + BATCH_SIZE)):
+                # Oldest first, so ids grow with created_at as in production
+                created_at = now - timedelta(seconds=span * (1 - number / count) + rng.random() * 60)
+                batch.append(_order(rng, number, created_at, products))
+            with transaction.atomic():
+                Order.objects.bulk_create([order for order, _ in batch], batch_size=BATCH_SIZE)
+                items = []
+                for order, order_items in batch:
+                    for item in order_items:
+                        item.order = order
+                        items.append(item)
+                OrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+            items_created += len(items)
+            if progress:
+                progress(min(count, start + BATCH_SIZE))
+    return items_created
+
+
+def seed(products=2000, images=200, orders=200000, days=365, seed=1, workers=None, progress=None):
+    """Generate the whole data set; returns a report of counts and the product import report."""
+    report = {'products': product_io.import_products(
+        product_rows(products, images, seed), SyntheticImages(), workers=workers,
+    )}
+    report['orders'] = orders
+    report['items'] = seed_orders(orders, days, seed, progress) if orders else 0
+    # Bulk inserts send no signals: rebuild the rollups and catalog caches
+    report['rollup_days'] = rollups.refresh_since(full=True)
+    catalog.bump_version()
+    return report
+
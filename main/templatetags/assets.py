@@ -0,0 +1,56 @@
+import json
+
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from main import assets, video
+
+register = template.Library()
+
+
+@register.simple_tag
+def critical_css():
+    """Inline the critical CSS of the built bundles, if they are in use."""
+    css = assets.inline_critical_css()
+    return mark_safe(f'<style>{css}</style>') if css else ''
+
+
+@register.simple_tag
+def bundle(name, preload=False):
+    """Link a bundle from main.assets.BUNDLES, or its source files until it is built.
+
+    With ``preload``, for a page that inlines {% critical_css %}, the built
+    stylesheet is preloaded and applied once it arrives instead of blocking
+    the first paint.
+    """
+    if not assets.use_bundles():
+        urls = [static(source) for source in assets.BUNDLES[name]]
+    else:
+        urls = [static(name)]
+    if name.endswith('.js'):
+        return format_html_join('\n', '<script src="{}"></script>', ((url,) for url in urls))
+    if preload and assets.inline_critical_css():
+        return format_html(
+            '<link rel="preload" href="{0}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            '<noscript><link rel="stylesheet" href="{0}"></noscript>',
+            urls[0],
+        )
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+
+
+@register.simple_tag
+def video_renditions(source):
+    """``poster`` and ``data-renditions`` attributes for a background video main.js loads after the first paint.
+
+    The poster shows until then. main.js picks the smallest rendition from
+    main.video that covers the element, or keeps just the poster for
+    reduced motion and data saving; without renditions it plays ``source``.
+    """
+    manifest = video.manifest(source)
+    if not manifest:
+        return format_html('data-renditions="{}"', json.dumps([{'src': static(source)}]))
+    renditions = [{'src': static(r['name']), 'width': r['width'], 'height': r['height']}
+                  for r in manifest['renditions']]
+    return format_html('poster="{}" data-renditions="{}"', static(manifest['poster']), json.dumps(renditions))
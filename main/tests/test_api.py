@@ -0,0 +1,64 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from main.models import Product
+
+from .utils import CacheResetMixin, create_products
+
+
+class ProductCursorTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(12)
+        Product.objects.filter(pk=cls.products[0].pk).update(is_active=False)
+
+    def test_pages_cover_the_catalog_once(self):
+        seen = []
+        params = {'limit': 5, 'fields': 'id'}
+        while True:
+            data = self.client.get(reverse('api_products'), params).json()
+            seen += [product['id'] for product in data['results']]
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        expected = list(Product.objects.filter(is_active=True).order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('api_products'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+
+class ProductFieldsTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_products(3)
+
+    def test_selected_and_excluded_fields(self):
+        data = self.client.get(reverse('api_products'), {'fields': 'id,name,price'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'name', 'price'})
+        data = self.client.get(reverse('api_products'), {'exclude': 'image,description'}).json()
+        self.assertNotIn('image', data['results'][0])
+        self.assertIn('name', data['results'][0])
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('api_products'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'success': False, 'error': 'Unknown fields: secret'})
+
+
+class ConditionalProductsTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = create_products(1)[0]
+
+    def test_not_modified_until_the_catalog_changes(self):
+        etag = self.client.get(reverse('api_products'))['ETag']
+        self.assertEqual(self.client.get(reverse('api_products'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        response = self.client.get(reverse('api_products'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from main import catalog
+
+from .utils import CacheResetMixin, create_products
+
+
+class CatalogVersionTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = create_products(1)[0]
+
+    def test_product_changes_bump_the_version_after_commit(self):
+        version = catalog.get_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product.save()
+        self.assertEqual(catalog.get_version(), version)
+        for callback in callbacks:
+            callback()
+        saved = catalog.get_version()
+        self.assertGreater(saved, version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertGreater(catalog.get_version(), saved)
+
+    def test_entries_are_rebuilt_for_the_new_version(self):
+        self.assertEqual(catalog.active_count(), (catalog.get_version(), 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            create_products(2)
+        version, count = catalog.active_count()
+        self.assertEqual(version, catalog.get_version())
+        self.assertEqual(count, 3)
+
+    def test_previous_value_is_served_during_a_rebuild(self):
+        old_version, _ = catalog.get_or_build('entry', lambda: 'old')
+        new_version = catalog.bump_version()
+        cache.add(f'catalog:{new_version}:entry:lock', 1)  # another worker is rebuilding
+        self.assertEqual(catalog.get_or_build('entry', lambda: 'new'), (old_version, 'old'))
+        # Unless it must be current: then it waits, and builds it itself
+        with mock.patch.object(catalog, 'LOCK_WAIT', 0):
+            self.assertEqual(catalog.get_or_build('entry', lambda: 'new', stale=False), (new_version, 'new'))
@@ -0,0 +1,61 @@
+import json
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from main.models import Order, Product
+
+from .utils import CacheResetMixin, checkout_payload, create_products
+
+
+class CheckoutTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.flower, cls.edible = create_products(2)
+
+    def post_order(self, payload, **headers):
+        return self.client.post(reverse('save_order'), json.dumps(payload), content_type='application/json', **headers)
+
+    def test_prices_come_from_the_catalog(self):
+        items = [
+            {'id': self.flower.id, 'quantity': 2, 'price': '1.00'},
+            {'id': self.edible.id, 'quantity': 1, 'price': '1.00'},
+        ]
+        response = self.post_order(checkout_payload(items, total='2.00'))
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(pk=response.json()['order_id'])
+        subtotal = self.flower.price * 2 + self.edible.price
+        self.assertEqual(order.subtotal, subtotal)
+        self.assertEqual(order.total_amount, subtotal + Order.SHIPPING_PRICES['standard'])
+        self.assertEqual(
+            sorted(order.items.values_list('product_id', 'quantity', 'unit_price')),
+            sorted([(self.flower.id, 2, self.flower.price), (self.edible.id, 1, self.edible.price)]),
+        )
+
+    def test_price_change_applies_to_the_next_order(self):
+        self.flower.price = Decimal('42.00')
+        self.flower.save()
+        response = self.post_order(checkout_payload([{'id': self.flower.id, 'quantity': 1}], delivery_type='pickup'))
+        self.assertEqual(response.json()['total'], '42.00')
+
+    def test_rejects_unknown_and_inactive_products(self):
+        Product.objects.filter(pk=self.edible.pk).update(is_active=False)
+        for items in ([{'id': 999999, 'quantity': 1}], [{'id': self.edible.id, 'quantity': 1}],
+                      [{'id': self.flower.id, 'quantity': 0}], []):
+            response = self.post_order(checkout_payload(items))
+            self.assertEqual(response.status_code, 400, items)
+        self.assertFalse(Order.objects.exists())
+
+    def test_retry_with_the_same_key_returns_the_first_order(self):
+        payload = checkout_payload([{'id': self.flower.id, 'quantity': 1}])
+        first = self.post_order(payload, HTTP_IDEMPOTENCY_KEY='checkout-1').json()
+        retry = self.post_order(payload, HTTP_IDEMPOTENCY_KEY='checkout-1').json()
+        self.assertEqual(retry, {'success': True, 'order_id': first['order_id'], 'duplicate': True})
+        self.assertEqual(Order.objects.count(), 1)
+
+        # Also when the key comes in the body, as the checkout page sends it
+        other = self.post_order({**payload, 'idempotency_key': 'checkout-2'}).json()
+        self.assertNotEqual(other['order_id'], first['order_id'])
+        self.assertTrue(self.post_order({**payload, 'idempotency_key': 'checkout-2'}).json()['duplicate'])
+        self.assertEqual(Order.objects.count(), 2)
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from main import exports
+
+from .utils import create_order, create_products
+
+
+class OrderExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.flower, cls.edible = create_products(2)
+        cls.first = create_order([(cls.flower, 2), (cls.edible, 1)], payment_method='eft')
+        cls.second = create_order([(cls.edible, 3)], payment_method='cash', status='delivered')
+        cls.user = User.objects.create_superuser('staff', 'staff@example.com', 'password')
+
+    def export(self, **params):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('admin_orders_export'), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_has_a_row_per_line_item(self):
+        response, content = self.export(format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            [(int(row['order_id']), row['product_name'], int(row['quantity'])) for row in rows],
+            [(self.first.id, self.flower.name, 2), (self.first.id, self.edible.name, 1),
+             (self.second.id, self.edible.name, 3)],
+        )
+        self.assertEqual(rows[0]['total'], str(self.first.total_amount))
+
+    def test_ndjson_nests_the_items(self):
+        _, content = self.export(format='ndjson', status='delivered')
+        orders = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([order['order_id'] for order in orders], [self.second.id])
+        self.assertEqual([item['quantity'] for item in orders[0]['items']], [3])
+
+    def test_items_are_prefetched_per_chunk(self):
+        with mock.patch.object(exports, 'CHUNK_SIZE', 1):
+            orders = [json.loads(line) for line in exports.iter_ndjson({})]
+        self.assertEqual(
+            [(order['order_id'], len(order['items'])) for order in orders],
+            [(self.first.id, 2), (self.second.id, 1)],
+        )
+
+    def test_invalid_filters_fail_before_streaming(self):
+        self.client.force_login(self.user)
+        for params in ({'format': 'xml'}, {'status': 'lost'}, {'date_from': '18/10/2026'}):
+            response = self.client.get(reverse('admin_orders_export'), params)
+            self.assertEqual(response.status_code, 400, params)
+        with self.assertRaises(CommandError):
+            call_command('export_orders', '--to', 'yesterday', stdout=io.StringIO())
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_orders', '--format', 'ndjson', '--payment-method', 'cash', stdout=out)
+        self.assertEqual([json.loads(line)['order_id'] for line in out.getvalue().splitlines()], [self.second.id])
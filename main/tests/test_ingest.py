@@ -0,0 +1,87 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from main import ingest
+from main.models import Order, SalesRollup
+
+from .utils import CacheResetMixin, create_order, create_products
+
+
+def unsaved_order(product, quantity=1, key=None):
+    order = Order(first_name='Test', last_name='Customer', customer_email='test@example.com', idempotency_key=key)
+    rows = order.build_items([{'id': product.id, 'quantity': quantity}])
+    order.apply_totals(rows)
+    return order, rows
+
+
+class WriteOrdersTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = create_products(1)[0]
+
+    def test_one_batch(self):
+        existing = create_order([(self.product, 1)], idempotency_key='seen')
+        entries = [
+            unsaved_order(self.product, 2, key='a'),
+            unsaved_order(self.product, 3),
+            unsaved_order(self.product, 1, key='seen'),
+            unsaved_order(self.product, 2, key='a'),  # retried within the batch
+        ]
+        results = ingest.write_orders(entries)
+
+        first, second = entries[0][0], entries[1][0]
+        self.assertEqual(results, [(first.id, False), (second.id, False), (existing.id, True), (first.id, True)])
+        self.assertEqual(Order.objects.count(), 3)
+        self.assertEqual(list(first.items.values_list('quantity', flat=True)), [2])
+        # bulk_create sends no signals; the batch adds itself to the rollups
+        status = SalesRollup.objects.get(dimension='status', key='pending')
+        self.assertEqual((status.orders, status.units), (2, 5))
+        self.assertEqual(Order.objects.filter(in_rollups=True).count(), 2)
+
+    def test_key_committed_after_the_lookup(self):
+        existing = create_order([(self.product, 1)], idempotency_key='raced')
+        entries = [unsaved_order(self.product, key='raced'), unsaved_order(self.product)]
+        # The first lookup misses the key, as if it committed just after it
+        with mock.patch.object(ingest, '_existing_order_ids', side_effect=[{}, {'raced': existing.id}]):
+            results = ingest.write_orders(entries)
+        self.assertEqual(results[0], (existing.id, True))
+        self.assertEqual(results[1], (entries[1][0].id, False))
+        self.assertEqual(Order.objects.count(), 2)
+
+
+@override_settings(INGEST_BATCH_SIZE=3, INGEST_MAX_WAIT=0.05)
+class BatchWriterTests(SimpleTestCase):
+    def test_batches_and_per_item_results(self):
+        batches = []
+
+        def flush(items):
+            batches.append(items)
+            return [ValueError(item) if item == 'bad' else item.upper() for item in items]
+
+        writer = ingest.BatchWriter('test', flush)
+
+        async def submit_all():
+            return await asyncio.gather(
+                *(writer.submit(item) for item in ['a', 'bad', 'c', 'd']), return_exceptions=True,
+            )
+
+        results = asyncio.run(submit_all())
+        self.assertEqual(results[0::2], ['A', 'C'])
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[3], 'D')
+        self.assertEqual(batches, [['a', 'bad', 'c'], ['d']])
+
+    def test_failed_flush_fails_the_whole_batch(self):
+        def flush(items):
+            raise RuntimeError('database unavailable')
+
+        writer = ingest.BatchWriter('test', flush)
+
+        async def submit_all():
+            return await asyncio.gather(writer.submit(1), writer.submit(2), return_exceptions=True)
+
+        with self.assertLogs('main.ingest', 'ERROR'):
+            results = asyncio.run(submit_all())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
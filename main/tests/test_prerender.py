@@ -0,0 +1,68 @@
+import json
+import tempfile
+import tomllib
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+
+from main import prerender
+
+from .utils import CacheResetMixin, create_products
+
+ORIGIN = 'https://origin.example.com'
+
+
+class NetlifyConfigTests(TestCase):
+    def test_rules_go_first_and_are_replaced_in_place(self):
+        own = '[build]\n  publish = "."\n'
+        config = prerender.netlify_config(own, ORIGIN, signed=False).decode()
+        self.assertTrue(config.startswith(prerender.RULES_BEGIN))
+        self.assertTrue(config.endswith(own))
+
+        again = prerender.netlify_config(config, ORIGIN, signed=True).decode()
+        self.assertEqual(again.count(prerender.RULES_BEGIN), 1)
+        self.assertTrue(again.endswith(own))
+        rules = tomllib.loads(again)['redirects']
+        self.assertEqual(rules[0], {
+            'from': '/api/*', 'to': f'{ORIGIN}/api/:splat', 'status': 200, 'signed': prerender.SIGNING_VARIABLE,
+        })
+        self.assertEqual(len(rules), len(prerender.PROXIED_PATHS) + 1)
+
+    def test_redirects_file_has_no_rules(self):
+        lines = prerender.redirects().decode().splitlines()
+        self.assertTrue(all(line.startswith('#') for line in lines))
+
+
+class ExportTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(3)
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.out_dir = Path(directory.name)
+
+    def test_unchanged_catalog_is_not_written_again(self):
+        report = prerender.export(self.out_dir, ORIGIN + '/')
+        self.assertEqual(report['written'], [prerender.INDEX, prerender.REDIRECTS, prerender.NETLIFY_CONFIG, prerender.SNAPSHOT])
+        snapshot = json.loads((self.out_dir / prerender.SNAPSHOT).read_text())
+        self.assertEqual(len(snapshot['products']), 3)
+        self.assertIn(self.products[0].name, (self.out_dir / prerender.INDEX).read_text())
+
+        self.assertTrue(prerender.export(self.out_dir, ORIGIN)['skipped'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].delete()
+        report = prerender.export(self.out_dir, ORIGIN)
+        self.assertIn(prerender.SNAPSHOT, report['written'])
+        self.assertNotIn(prerender.NETLIFY_CONFIG, report['written'])
+
+    def test_signing_changes_the_rules(self):
+        prerender.export(self.out_dir, ORIGIN)
+        with override_settings(STATIC_SITE_PROXY_SECRET='secret'):
+            report = prerender.export(self.out_dir, ORIGIN)
+        self.assertIn(prerender.NETLIFY_CONFIG, report['written'])
+        rules = tomllib.loads((self.out_dir / prerender.NETLIFY_CONFIG).read_text())['redirects']
+        self.assertTrue(all(rule['signed'] == prerender.SIGNING_VARIABLE for rule in rules))
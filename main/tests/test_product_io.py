@@ -0,0 +1,81 @@
+import io
+import zipfile
+from decimal import Decimal
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from main import product_io
+from main.models import Product
+
+
+def png_bytes(color):
+    out = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(out, 'PNG')
+    return out.getvalue()
+
+
+def images_zip(files):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w') as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    out.seek(0)
+    return product_io.ZipImages(out)
+
+
+def row(sku, **values):
+    return {'sku': sku, 'name': f'Product {sku}', 'price': '100', **values}
+
+
+@override_settings(STORAGES={**settings.STORAGES, 'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'}})
+class ImportProductsTests(TestCase):
+    def test_bad_rows_are_reported_and_skipped(self):
+        rows = [
+            row('A-1'),
+            row('', name='No SKU'),
+            row('A-2', price='cheap'),
+            row('A-3', category='seeds'),
+            row('A-4', is_active='maybe'),
+            row('A-1', name='Again'),
+            row('A-5', image='missing.png'),
+        ]
+        report = product_io.import_products(rows, images_zip({}), workers=2)
+        self.assertEqual(report['errors'], [
+            'Row 2: sku is required',
+            'Row 3: invalid price "cheap"',
+            'Row 4: invalid category "seeds"',
+            'Row 5: invalid is_active "maybe"',
+            'Row 6: duplicate sku "A-1"',
+            'Image missing.png: not found in the zip',
+        ])
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['A-1'])
+
+    def test_images_need_a_source(self):
+        report = product_io.import_products([row('A-1', image='a.png')])
+        self.assertEqual(report['errors'], ['Image a.png: no image folder or zip was given'])
+        self.assertFalse(Product.objects.exists())
+
+    def test_upsert_by_sku(self):
+        images = images_zip({'img/a.png': png_bytes('red')})
+        report = product_io.import_products([row('A-1', image='a.png'), row('A-2', is_active='no')], images)
+        self.assertEqual((report['created'], report['updated'], report['errors']), (2, 0, []))
+        product = Product.objects.get(sku='A-1')
+        self.assertTrue(product.image_hash)
+        self.assertFalse(Product.objects.get(sku='A-2').is_active)
+
+        report = product_io.import_products([row('A-1', image='a.png'), row('A-2', price='120', is_active='no')], images)
+        self.assertEqual((report['created'], report['updated'], report['unchanged']), (0, 1, 1))
+        self.assertEqual(Product.objects.get(sku='A-2').price, Decimal('120.00'))
+        self.assertEqual(Product.objects.get(sku='A-1').image_hash, product.image_hash)
+
+    def test_export_reads_back(self):
+        product_io.import_products([row('A-1', description='First'), row('A-2', strain='indica')])
+        out = io.StringIO()
+        product_io.write_catalog(out, 'json')
+        out.seek(0)
+        rows = product_io.read_catalog(out, 'products.json')
+        self.assertEqual([(r['sku'], r['strain']) for r in rows], [('A-1', 'hybrid'), ('A-2', 'indica')])
+        self.assertEqual(product_io.import_products(rows)['unchanged'], 2)
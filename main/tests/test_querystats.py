@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main import admin as main_admin
+from main import middleware
+from main.querystats import QueryBudgetExceeded, Recorder
+
+from .utils import CacheResetMixin, create_order, create_products
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class QueryBudgetTests(CacheResetMixin, TestCase):
+    """The middleware raises QueryBudgetExceeded when a view runs more queries than it declares."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(30)
+        cls.user = User.objects.create_superuser('staff', 'staff@example.com', 'password')
+        # More than one page of the admin order list
+        for i in range(main_admin.ADMIN_ORDERS_PAGE_SIZE + 10):
+            create_order([(cls.products[i % 30], 1 + i % 3)], payment_method='eft' if i % 2 else 'cash')
+
+    def test_home(self):
+        for _ in range(2):  # cold and warm catalog cache
+            self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+    def test_api_products(self):
+        for _ in range(2):
+            response = self.client.get(reverse('api_products'), {'limit': 10})
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('api_products'), {'limit': 10, 'cursor': response.json()['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_product_search(self):
+        for params in ({'q': 'product'}, {'category': 'flower'}, {'q': 'description', 'strain': 'hybrid'}):
+            self.assertEqual(self.client.get(reverse('api_product_search'), params).status_code, 200)
+
+    def test_admin_orders(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('admin_orders'))
+        self.assertEqual(response.status_code, 200)
+        older_url = reverse('admin_orders') + response.context['older_url']
+        self.assertEqual(self.client.get(older_url).status_code, 200)
+        self.assertEqual(self.client.get(reverse('admin_orders'), {'status': 'pending'}).status_code, 200)
+
+    def test_overrun_fails(self):
+        with mock.patch.object(main_admin.api_products, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('api_products'))
+
+
+@override_settings(QUERY_STATS_SAMPLE_RATE=1.0, QUERY_REPEAT_THRESHOLD=3, SLOW_REQUEST_SECONDS=60)
+class QueryStatsTests(CacheResetMixin, TestCase):
+    def test_server_timing_counts_the_queries(self):
+        create_products(2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('api_products'), {'fields': 'id'})
+        self.assertRegex(response['Server-Timing'], r'^db;desc="(\d+) queries";dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIn(f'desc="{len(queries)} queries"', response['Server-Timing'])
+
+    def test_in_lists_of_any_length_are_one_query(self):
+        recorder = Recorder()
+        for sql in ('SELECT 1 WHERE id IN (%s, %s)', 'SELECT 1 WHERE id IN (%s, %s, %s)', 'SELECT 2'):
+            recorder.add(sql, 0.001)
+        self.assertEqual(recorder.repeated(2), [('SELECT 1 WHERE id IN (...)', 2)])
+
+    def test_repeated_queries_are_logged(self):
+        recorder = Recorder()
+        for _ in range(3):
+            recorder.add('SELECT * FROM main_product WHERE id = %s', 0.001)
+        with self.assertLogs('main.middleware', 'WARNING') as logs:
+            middleware._report_queries(RequestFactory().get('/'), HttpResponse(), recorder, 0.01)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Query repeated 3 times in GET / (-)', logs.output[0])
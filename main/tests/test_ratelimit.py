@@ -0,0 +1,93 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from main import admin as main_admin
+from main import ratelimit
+
+from .utils import CacheResetMixin
+
+
+def netlify_token(secret, **claims):
+    """An X-Nf-Sign value as Netlify makes them: an HS256 JWS of the claims."""
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+
+    signed = f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'iss': 'netlify', **claims})}"
+    signature = hmac.new(secret.encode(), signed.encode(), hashlib.sha256).digest()
+    return f"{signed}.{base64.urlsafe_b64encode(signature).decode().rstrip('=')}"
+
+
+class RateLimitTests(CacheResetMixin, TestCase):
+    def post_inquiry(self, **headers):
+        return self.client.post(reverse('save_inquiry'), json.dumps({}), content_type='application/json', **headers)
+
+    def test_limit_then_retry_after(self):
+        limit, window = main_admin.INQUIRY_RATE_LIMIT
+        for _ in range(limit):
+            self.assertNotEqual(self.post_inquiry().status_code, 429)
+        response = self.post_inquiry()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json(), ratelimit.TOO_MANY_REQUESTS)
+        self.assertTrue(0 < int(response['Retry-After']) <= window)
+
+    def test_clients_are_limited_separately(self):
+        limit, _ = main_admin.INQUIRY_RATE_LIMIT
+        for _ in range(limit + 1):
+            self.post_inquiry(REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.post_inquiry(REMOTE_ADDR='10.0.0.1').status_code, 429)
+        self.assertNotEqual(self.post_inquiry(REMOTE_ADDR='10.0.0.2').status_code, 429)
+
+    def test_get_requests_are_not_counted(self):
+        limit, _ = main_admin.INQUIRY_RATE_LIMIT
+        for _ in range(limit + 1):
+            self.client.get(reverse('save_inquiry'))
+        self.assertNotEqual(self.post_inquiry().status_code, 429)
+
+    @override_settings(RATE_LIMIT_PROXY_COUNT=2)
+    def test_client_ip_trusts_only_the_configured_proxies(self):
+        request = mock.Mock(META={'HTTP_X_FORWARDED_FOR': 'forged, 198.51.100.7, 10.1.1.1', 'REMOTE_ADDR': '10.0.0.9'})
+        self.assertEqual(ratelimit.client_ip(request), '198.51.100.7')
+        with self.settings(RATE_LIMIT_PROXY_COUNT=0):
+            self.assertEqual(ratelimit.client_ip(request), '10.0.0.9')
+
+    @override_settings(CACHES={**settings.CACHES, 'shared': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:1/0',  # nothing listens there
+        'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.1, 'SOCKET_TIMEOUT': 0.1},
+    }})
+    def test_redis_outage_falls_back_to_the_process_window(self):
+        with mock.patch.object(ratelimit, '_script', None), self.assertLogs('main.ratelimit', 'WARNING'):
+            results = [ratelimit.hit('test', 'client', 2, 60) for _ in range(3)]
+        self.assertEqual([result.allowed for result in results], [True, True, False])
+
+
+@override_settings(RATE_LIMIT_PROXY_COUNT=1, STATIC_SITE_PROXY_SECRET='proxy-secret')
+class NetlifyProxyTests(SimpleTestCase):
+    FORWARDED = 'forged, 198.51.100.7, 10.1.1.1'
+
+    def client_ip(self, token=None):
+        meta = {'HTTP_X_FORWARDED_FOR': self.FORWARDED, 'REMOTE_ADDR': '10.0.0.9'}
+        if token:
+            meta['HTTP_X_NF_SIGN'] = token
+        return ratelimit.client_ip(mock.Mock(META=meta))
+
+    def test_signed_requests_trust_netlify_hop(self):
+        self.assertEqual(self.client_ip(netlify_token('proxy-secret', exp=time.time() + 60)), '198.51.100.7')
+
+    def test_unsigned_or_forged_requests_do_not(self):
+        for token in (None, 'not-a-token', netlify_token('other-secret'),
+                      netlify_token('proxy-secret', exp=time.time() - 60),
+                      netlify_token('proxy-secret', iss='someone-else')):
+            self.assertEqual(self.client_ip(token), '10.1.1.1', token)
+
+    def test_no_secret_configured(self):
+        with self.settings(STATIC_SITE_PROXY_SECRET=''):
+            self.assertEqual(self.client_ip(netlify_token('')), '10.1.1.1')
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from main import rollups
+from main.models import Order, SalesRollup
+
+from .utils import CacheResetMixin, create_order, create_products
+
+
+def rollup_rows():
+    return sorted(SalesRollup.objects.values_list('day', 'dimension', 'key', 'orders', 'units', 'revenue'))
+
+
+class SalesRollupTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.flower, cls.edible = create_products(2)
+
+    def place_order(self, items, **fields):
+        # The rollups are updated once the order commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_order(items, **fields)
+
+    def assert_matches_full_refresh(self):
+        rows = rollup_rows()
+        rollups.refresh_since(full=True)
+        self.assertEqual(rows, rollup_rows())
+
+    def test_new_orders_are_added(self):
+        self.place_order([(self.flower, 2), (self.edible, 1)])
+        self.place_order([(self.flower, 1)], status='cancelled')
+        status = SalesRollup.objects.get(dimension='status', key='pending')
+        self.assertEqual((status.orders, status.units, status.revenue), (1, 3, Order.objects.get(status='pending').total_amount))
+        # Cancelled orders count towards their status only
+        product = SalesRollup.objects.get(dimension='product', key=str(self.flower.id))
+        self.assertEqual((product.orders, product.units), (1, 2))
+        self.assert_matches_full_refresh()
+
+    def test_each_order_is_counted_once(self):
+        order = self.place_order([(self.flower, 2)])
+        rows = rollup_rows()
+        rollups.add_orders([order])
+        self.assertEqual(rollup_rows(), rows)
+
+        # A refresh that already counted an order before its own update ran
+        with self.captureOnCommitCallbacks() as callbacks:
+            order = create_order([(self.edible, 1)])
+        rollups.refresh_days([timezone.localdate(order.created_at)])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(SalesRollup.objects.get(dimension='status', key='pending').orders, 2)
+        self.assert_matches_full_refresh()
+
+    def test_changes_rebuild_the_day(self):
+        order = self.place_order([(self.flower, 2)])
+        order.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save(update_fields=['status'])
+        self.assertEqual(rollup_rows(), [(timezone.localdate(order.created_at), 'status', 'cancelled', 1, 2, order.total_amount)])
+        self.assertTrue(Order.objects.get(pk=order.pk).in_rollups)
+
+    def test_failed_refresh_is_caught_up_by_the_command(self):
+        order = self.place_order([(self.flower, 2)])
+        order.status = 'delivered'
+        with mock.patch.object(rollups, 'refresh_days', side_effect=RuntimeError), self.assertLogs(level='ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                order.save()
+        self.assertFalse(Order.objects.get(pk=order.pk).in_rollups)
+        self.assertEqual(SalesRollup.objects.get(dimension='status').key, 'pending')
+
+        self.assertEqual(rollups.refresh_since(), 1)
+        self.assertEqual(SalesRollup.objects.get(dimension='status').key, 'delivered')
+        self.assertEqual(rollups.refresh_since(), 0)
+
+    def test_dashboard_stats(self):
+        self.place_order([(self.flower, 2)])
+        self.place_order([(self.edible, 1)], status='cancelled')
+        stats = rollups.dashboard_stats()
+        self.assertEqual((stats['total_orders'], stats['pending_orders'], stats['orders_today']), (2, 1, 2))
+        self.assertEqual(stats['revenue_today'], Order.objects.get(status='pending').total_amount)
+        self.assertEqual([product['key'] for product in stats['top_products']], [str(self.flower.id)])
@@ -0,0 +1,65 @@
+import warnings
+from decimal import Decimal
+
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import TestCase
+from django.urls import reverse
+
+from main import search
+from main.models import Product
+
+from .utils import CacheResetMixin
+
+
+def facet(found, name):
+    return {entry['value']: entry['count'] for entry in found['facets'][name]}
+
+
+class SearchProductsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, category, strain, price in [
+            ('Sour Diesel', 'flower', 'sativa', '90'),
+            ('Northern Lights', 'flower', 'indica', '180'),
+            ('Mixed Gummies', 'edibles', 'all', '300'),
+            ('Hybrid Cookies', 'edibles', 'hybrid', '600'),
+        ]:
+            Product.objects.create(name=name, category=category, strain=strain, price=Decimal(price),
+                                   description=f'{name} description')
+
+    def names(self, **filters):
+        return sorted(product.name for product in search.search_products(**filters)['products'])
+
+    def test_strain_filter_includes_products_for_all_strains(self):
+        self.assertEqual(self.names(strain='sativa'), ['Mixed Gummies', 'Sour Diesel'])
+        self.assertEqual(len(self.names(strain='all')), 4)
+
+    def test_facets_ignore_their_own_filter(self):
+        found = search.search_products(category='flower', strain='indica')
+        self.assertEqual(found['total'], 1)
+        categories = dict.fromkeys(dict(Product.CATEGORY_CHOICES), 0)
+        categories.update(flower=1, edibles=1)
+        self.assertEqual(facet(found, 'category'), categories)
+        # Each strain count is what choosing that strain would return
+        self.assertEqual(facet(found, 'strain'), {'sativa': 1, 'indica': 1, 'hybrid': 0, 'all': 2})
+
+    def test_text_and_price(self):
+        self.assertEqual(self.names(text='cookies'), ['Hybrid Cookies'])
+        low, high = search.price_bounds('100-250')
+        self.assertEqual(self.names(min_price=low, max_price=high), ['Northern Lights'])
+        with self.assertRaises(ValueError):
+            search.price_bounds('cheap')
+
+
+class SearchApiTests(CacheResetMixin, TestCase):
+    def test_any_text_makes_a_valid_cache_key(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            for text in ('two words', 'x' * 100, 'ünïcode\n'):
+                response = self.client.get(reverse('api_product_search'), {'q': text})
+                self.assertEqual(response.status_code, 200, text)
+
+    def test_invalid_strain(self):
+        response = self.client.get(reverse('api_product_search'), {'strain': 'ruderalis'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'success': False, 'error': 'Invalid strain'})
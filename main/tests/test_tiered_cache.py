@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from main import tiered_cache
+from main.tiered_cache import TieredCache
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'test-l2': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-cache-tests'},
+    'test-down': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:1/0',  # nothing listens there
+        'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.1, 'SOCKET_TIMEOUT': 0.1},
+    },
+})
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['test-l2'].clear()
+        tiered_cache.reset_stats()
+
+    def tiered(self, location, **options):
+        return TieredCache(location, {'OPTIONS': {'L1_TIMEOUT': 0.05, 'RETRY_AFTER': 30, **options}})
+
+    def test_l2_values_are_kept_in_l1_briefly(self):
+        first, second = self.tiered('test-l2'), self.tiered('test-l2')
+        first.set('tiered:key', 'one', 60)
+        self.assertEqual(second.get('tiered:key'), 'one')
+        first.set('tiered:key', 'two', 60)
+        self.assertEqual(second.get('tiered:key'), 'one')  # from its L1
+        time.sleep(0.06)
+        self.assertEqual(second.get('tiered:key'), 'two')
+        self.assertEqual(tiered_cache.stats()['tiered']['l1_hits'], 1)
+        self.assertEqual(tiered_cache.stats()['tiered']['l2_hits'], 2)
+
+    def test_add_is_decided_by_l2(self):
+        first, second = self.tiered('test-l2'), self.tiered('test-l2')
+        self.assertTrue(first.add('lock', 1, 60))
+        self.assertFalse(second.add('lock', 1, 60))
+
+    def test_l2_outage_falls_back_to_l1(self):
+        cache = self.tiered('test-down')
+        with self.assertLogs('main.tiered_cache', 'WARNING') as logs:
+            cache.set('tiered:key', 'value', None)
+            self.assertEqual(cache.get('tiered:key'), 'value')
+            self.assertTrue(cache.add('tiered:lock', 1, 60))
+            self.assertFalse(cache.add('tiered:lock', 1, 60))
+        # L2 is left alone for RETRY_AFTER seconds after the first failure
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(tiered_cache.stats()['tiered']['errors'], 1)
+
+        # Nothing written during the outage outlives L1_TIMEOUT
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('tiered:key'))
+
+    def test_l1_only(self):
+        cache = self.tiered('')
+        cache.set('tiered:key', 'value', None)
+        self.assertEqual(cache.get('tiered:key'), 'value')
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('tiered:key'))
+        self.assertNotIn('errors', tiered_cache.stats()['tiered'])
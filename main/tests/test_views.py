@@ -0,0 +1,33 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from main.models import Product
+
+from .utils import CacheResetMixin, create_products
+
+
+class HomePageTests(CacheResetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(12)
+        Product.objects.filter(pk=cls.products[0].pk).update(is_active=False)
+
+    def test_first_page_and_catalog_size(self):
+        with self.settings(HOME_PAGE_SIZE=4):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(len(response.context['products']), 4)
+        # The stat counts the whole catalog, not the page
+        self.assertEqual(response.context['product_count'], 11)
+        self.assertContains(response, '<span class="stat-number">11+</span>', html=True)
+
+    def test_home_hands_its_cursor_to_the_api(self):
+        with self.settings(HOME_PAGE_SIZE=4):
+            next_cursor = self.client.get(reverse('home')).context['next_cursor']
+        data = self.client.get(reverse('api_products'), {'cursor': next_cursor, 'fields': 'id'}).json()
+        expected = Product.objects.filter(is_active=True).order_by('-created_at', '-id').values_list('id', flat=True)
+        self.assertEqual([product['id'] for product in data['results']], list(expected[4:]))
+
+    def test_whole_catalog_on_one_page(self):
+        response = self.client.get(reverse('home'), {'page_size': 50})
+        self.assertEqual(len(response.context['products']), 11)
+        self.assertEqual(response.context['next_cursor'], '')
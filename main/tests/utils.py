@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+
+from main import ratelimit
+from main.models import Order, Product
+
+
+def create_products(count):
+    return [
+        Product.objects.create(
+            name=f'Product {i}', category='flower' if i % 2 else 'edibles', strain='hybrid',
+            price=Decimal('100.00') + i, description=f'Description {i}',
+        )
+        for i in range(count)
+    ]
+
+
+def create_order(items, **fields):
+    """Save an order for ``[(product, quantity)]`` the way checkout does."""
+    order = Order(first_name='Test', last_name='Customer', customer_email='test@example.com', **fields)
+    rows = order.build_items([{'id': product.id, 'quantity': quantity} for product, quantity in items])
+    order.apply_totals(rows)
+    order.save_with_items(rows)
+    return order
+
+
+def checkout_payload(items, **extra):
+    return {
+        'customer': {'first_name': 'Test', 'last_name': 'Customer', 'email': 'test@example.com', 'phone': '0820000000'},
+        'address': {'street': '1 Main Road', 'city': 'Cape Town', 'postal_code': '8001'},
+        'delivery_type': 'delivery',
+        'shipping_option': 'standard',
+        'payment_method': 'eft',
+        'items': items,
+        **extra,
+    }
+
+
+class CacheResetMixin:
+    def setUp(self):
+        # The catalog cache and rate limit windows outlive a test's transaction
+        cache.clear()
+        ratelimit._local_hits.clear()
@@ -0,0 +1,258 @@
+"""
+Two-tier cache backend: a bounded in-process LRU (L1) in front of a shared
+cache such as Redis (L2).
+
+Reads are served from L1 when possible and otherwise from L2, whose value
+is then kept in L1 for at most L1_TIMEOUT seconds. That cap is the longest
+a worker can serve a value another worker has since replaced, so keep it
+short. Writes go to both tiers; add() and incr() go to L2 only, so locks
+and counters stay shared.
+
+If L2 fails the error is logged, the call falls back to L1 alone and L2
+is left alone for RETRY_AFTER seconds, so a Redis outage degrades to
+per-process caching instead of errors. Values written during an outage
+are kept for L1_TIMEOUT seconds at most too, so once L2 is back no
+worker keeps serving what only it wrote. The same cap applies without
+an L2 at all, since each worker process then has a cache of its own.
+
+Hits, misses, errors and L2 latency are counted per namespace - the key
+up to its first ':' (or the fragment name for template fragment keys) -
+and reported by stats() for this process and by /metrics (main/metrics.py)
+across workers.
+
+Configured in settings.CACHES:
+
+    'default': {
+        'BACKEND': 'main.tiered_cache.TieredCache',
+        'LOCATION': 'shared',  # alias of the L2 cache; empty for L1 only
+        'OPTIONS': {'L1_MAX_ENTRIES': 1000, 'L1_TIMEOUT': 5, 'RETRY_AFTER': 30},
+    }
+"""
+import logging
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+NAMESPACE_PATTERN = re.compile(r'template\.cache\.[^.]+|[^:]+')
+
+_stats = defaultdict(lambda: defaultdict(float))
+_stats_lock = threading.Lock()
+
+# Counters also exported to /metrics, which adds them up across workers
+METRIC_RESULTS = {'l1_hits': 'l1_hit', 'l2_hits': 'l2_hit', 'misses': 'miss'}
+
+
+def namespace(key):
+    match = NAMESPACE_PATTERN.match(str(key))
+    return match.group(0) if match else ''
+
+
+def _record(ns, **counts):
+    with _stats_lock:
+        for name, value in counts.items():
+            _stats[ns][name] += value
+    for name, value in counts.items():
+        if name in METRIC_RESULTS:
+            metrics.CACHE_REQUESTS.labels(ns, METRIC_RESULTS[name]).inc(value)
+        elif name == 'errors':
+            metrics.CACHE_ERRORS.labels(ns).inc(value)
+
+
+def stats():
+    """Counters of this process per namespace: l1_hits, l2_hits, misses, errors, l2_calls, l2_seconds."""
+    with _stats_lock:
+        return {ns: dict(counts) for ns, counts in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class LRUStore:
+    """Thread-safe bounded mapping of key -> (expires_at, pickled value)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, pickled = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        if self.max_entries <= 0 or (timeout is not None and timeout <= 0):
+            self.delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._data[key] = (expires_at, pickled)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def add(self, key, value, timeout):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                return False
+        self.set(key, value, timeout)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = location or None
+        self._l1 = LRUStore(int(options.get('L1_MAX_ENTRIES', 1000)))
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 5))
+        self._retry_after = float(options.get('RETRY_AFTER', 30))
+        self._l2_down_until = 0.0
+
+    @property
+    def _l2(self):
+        return caches[self._l2_alias]
+
+    def _timeout(self, timeout):
+        # Seconds, or None for no expiry; 0 or less expires immediately
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _l1_ttl(self, timeout):
+        # How long L1 may keep a value. Without L2 too: other workers have
+        # their own L1, and a change there must reach this one
+        return self._l1_timeout if timeout is None else min(timeout, self._l1_timeout)
+
+    def _call_l2(self, ns, method, *args, **kwargs):
+        """Run an L2 method; returns _MISSING if L2 is unavailable."""
+        if self._l2_alias is None or time.monotonic() < self._l2_down_until:
+            return _MISSING
+        started = time.perf_counter()
+        try:
+            result = getattr(self._l2, method)(*args, **kwargs)
+        except (ValueError, TypeError):
+            # Usage errors (e.g. incr of a missing key), not an outage
+            raise
+        except Exception:
+            self._l2_down_until = time.monotonic() + self._retry_after
+            _record(ns, errors=1, l2_calls=1, l2_seconds=time.perf_counter() - started)
+            logger.warning('L2 cache %s failed; using the in-process cache for %ss',
+                           method, self._retry_after, exc_info=True)
+            return _MISSING
+        _record(ns, l2_calls=1, l2_seconds=time.perf_counter() - started)
+        return result
+
+    def get(self, key, default=None, version=None):
+        ns = namespace(key)
+        l1_key = self.make_and_validate_key(key, version=version)
+        value = self._l1.get(l1_key)
+        if value is not _MISSING:
+            _record(ns, l1_hits=1)
+            return value
+        value = self._call_l2(ns, 'get', key, _MISSING, version=version)
+        if value is _MISSING:
+            _record(ns, misses=1)
+            return default
+        _record(ns, l2_hits=1)
+        self._l1.set(l1_key, value, self._l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remaining = []
+        for key in keys:
+            value = self._l1.get(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                remaining.append(key)
+            else:
+                _record(namespace(key), l1_hits=1)
+                found[key] = value
+        if remaining:
+            fetched = self._call_l2(namespace(remaining[0]), 'get_many', remaining, version=version)
+            if fetched is _MISSING:
+                fetched = {}
+            for key in remaining:
+                if key in fetched:
+                    _record(namespace(key), l2_hits=1)
+                    self._l1.set(self.make_and_validate_key(key, version=version), fetched[key], self._l1_timeout)
+                    found[key] = fetched[key]
+                else:
+                    _record(namespace(key), misses=1)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        l1_key = self.make_and_validate_key(key, version=version)
+        self._call_l2(namespace(key), 'set', key, value, timeout, version=version)
+        self._l1.set(l1_key, value, self._l1_ttl(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        timeout = self._timeout(timeout)
+        failed = self._call_l2(namespace(next(iter(data))), 'set_many', data, timeout, version=version)
+        for key, value in data.items():
+            self._l1.set(self.make_and_validate_key(key, version=version), value, self._l1_ttl(timeout))
+        return [] if failed is _MISSING else failed or []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        l1_key = self.make_and_validate_key(key, version=version)
+        added = self._call_l2(namespace(key), 'add', key, value, timeout, version=version)
+        if added is _MISSING:
+            return self._l1.add(l1_key, value, self._l1_ttl(timeout))
+        if added:
+            self._l1.set(l1_key, value, self._l1_ttl(timeout))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        touched = self._call_l2(namespace(key), 'touch', key, timeout, version=version)
+        return False if touched is _MISSING else touched
+
+    def delete(self, key, version=None):
+        deleted = self._l1.delete(self.make_and_validate_key(key, version=version))
+        l2_deleted = self._call_l2(namespace(key), 'delete', key, version=version)
+        return deleted if l2_deleted is _MISSING else bool(l2_deleted) or deleted
+
+    def incr(self, key, delta=1, version=None):
+        self._l1.delete(self.make_and_validate_key(key, version=version))
+        value = self._call_l2(namespace(key), 'incr', key, delta, version=version)
+        if value is _MISSING:
+            return super().incr(key, delta, version=version)
+        return value
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def clear(self):
+        self._l1.clear()
+        self._call_l2('', 'clear')
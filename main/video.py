@@ -0,0 +1,132 @@
+"""
+Background video renditions: smaller encodes of a source video, a
+poster frame, and the manifest the {% video_renditions %} tag reads.
+
+encode() runs ffmpeg once per rendition in RENDITIONS no taller than
+the source. Each output is H.264 MP4 without audio, with its index at the
+front (faststart) so playback can begin from the first bytes, and a
+keyframe every two seconds so seeking and looping don't have to decode
+far. The poster is a single JPEG frame shown until the video plays, or
+instead of it for visitors who asked for reduced motion or data saving.
+
+Everything goes to rendition_dir(source) under static/ and is committed,
+so production needs no ffmpeg. The video files are served by WhiteNoise,
+which answers Range requests with 206 Partial Content.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+HERO_VIDEO = 'video/hero_frames/4823275-hd_1920_1080_30fps.mp4'
+MANIFEST = 'renditions.json'
+POSTER = 'poster.jpg'
+POSTER_HEIGHT = 720
+# (height, maximum bitrate in kbit/s); the CRF sets the quality, the cap
+# keeps busy scenes from spiking past what a slow connection can stream
+RENDITIONS = [
+    (480, 450),
+    (720, 900),
+    (1080, 1600),
+]
+CRF = 28
+KEYFRAME_SECONDS = 2
+
+
+def rendition_dir(source):
+    """Static path the renditions of ``source`` are written to."""
+    return f'video/renditions/{Path(source).stem}'
+
+
+def find_ffmpeg(path=None):
+    """``path``, ffmpeg on PATH, or the binary bundled with imageio-ffmpeg, if installed."""
+    if path:
+        return path
+    found = shutil.which('ffmpeg')
+    if found:
+        return found
+    try:
+        import imageio_ffmpeg
+    except ImportError:
+        raise ValueError('ffmpeg not found; install it or pass its path') from None
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def _run(ffmpeg, *args):
+    result = subprocess.run([ffmpeg, '-hide_banner', '-nostdin', *args], capture_output=True, text=True)
+    if result.returncode:
+        lines = result.stderr.strip().splitlines()
+        raise ValueError(f'ffmpeg failed: {lines[-1] if lines else result.returncode}')
+    return result
+
+
+def probe(ffmpeg, path):
+    """``(width, height, fps)`` of the first video stream, from ffmpeg's banner."""
+    # ffmpeg exits non-zero without an output file; the banner is all we need
+    stderr = subprocess.run([ffmpeg, '-hide_banner', '-i', str(path)], capture_output=True, text=True).stderr
+    match = re.search(r'Stream #.*?Video: .*?(\d{2,5})x(\d{2,5})', stderr)
+    if not match:
+        raise ValueError(f'{path}: no video stream found')
+    fps = re.search(r'([\d.]+) fps', stderr)
+    return int(match[1]), int(match[2]), float(fps[1]) if fps else 30.0
+
+
+def encode(source, ffmpeg=None, poster_at=0.0, force=False, progress=None):
+    """Write the renditions, poster and manifest for the static file ``source``; returns the manifest."""
+    path = finders.find(source)
+    if path is None:
+        raise ValueError(f'{source} not found in the static directories')
+    ffmpeg = find_ffmpeg(ffmpeg)
+    width, height, fps = probe(ffmpeg, path)
+    name = rendition_dir(source)
+    out_dir = Path(settings.BASE_DIR) / 'static' / name
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    poster = out_dir / POSTER
+    if force or not poster.exists():
+        _run(ffmpeg, '-y', '-ss', str(poster_at), '-i', path, '-frames:v', '1',
+             '-vf', f'scale=-2:{min(height, POSTER_HEIGHT)}', '-q:v', '5', str(poster))
+    manifest = {'source': source, 'poster': f'{name}/{POSTER}', 'renditions': []}
+
+    # Never upscale; a source smaller than every rendition gets one at its own size
+    heights = [(h, rate) for h, rate in RENDITIONS if h <= height] or [(height, RENDITIONS[0][1])]
+    for rendition_height, max_rate in heights:
+        target = out_dir / f'{rendition_height}p.mp4'
+        if force or not target.exists():
+            if progress:
+                progress(f'{name}/{target.name}')
+            _run(
+                ffmpeg, '-y', '-i', path, '-an',
+                '-vf', f'scale=-2:{rendition_height}',
+                '-c:v', 'libx264', '-preset', 'slow', '-crf', str(CRF),
+                '-maxrate', f'{max_rate}k', '-bufsize', f'{max_rate * 2}k',
+                '-g', str(round(fps * KEYFRAME_SECONDS)), '-pix_fmt', 'yuv420p',
+                '-movflags', '+faststart', str(target),
+            )
+        manifest['renditions'].append({
+            'name': f'{name}/{target.name}',
+            'width': round(width * rendition_height / height / 2) * 2,
+            'height': rendition_height,
+            'bytes': os.path.getsize(target),
+        })
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=2) + '\n', encoding='utf-8')
+    _manifests.pop(source, None)
+    return manifest
+
+
+# --- Template helper (main/templatetags/assets.py) ---
+
+_manifests = {}
+
+
+def manifest(source):
+    """The rendition manifest of ``source``, or None before encode() has run for it."""
+    if source not in _manifests:
+        path = finders.find(f'{rendition_dir(source)}/{MANIFEST}')
+        _manifests[source] = json.loads(Path(path).read_text(encoding='utf-8')) if path else None
+    return _manifests[source]
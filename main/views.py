@@ -1,21 +1,83 @@
+from django.conf import settings
 from django.shortcuts import render
-from .models import Product, SiteSettings
+from django.http import FileResponse, Http404, HttpResponse
+from django.views.decorators.http import etag
+from .models import Product
+from . import api, catalog, imaging, metrics, storage
+import hmac
+from .querystats import query_budget
 
 # Create your views here.
 
+# `settings` comes from the main.context_processors.site_settings processor
+
+@query_budget(7)
 def home(request):
-    products = Product.objects.filter(is_active=True)
-    settings, created = SiteSettings.objects.get_or_create(id=1)
-    
+    # Only the first page of the grid; main.js loads the rest from /api/products/
+    try:
+        page_size = int(request.GET.get('page_size', settings.HOME_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.HOME_PAGE_SIZE
+    page_size = min(max(page_size, 1), api.MAX_PAGE_SIZE)
+    version, page = catalog.storefront_page(page_size)
+    products = page[:page_size]
+
     context = {
         'products': products,
-        'settings': settings,
+        # The whole catalog, not just this page
+        'product_count': catalog.active_count()[1],
+        'page_size': page_size,
+        # Where /api/products/ carries on from
+        'next_cursor': api.encode_cursor(products[-1]) if len(page) > page_size else '',
+        # Keys for the {% cache %} fragments around the product grid: the
+        # version the list was built for, which during a rebuild elsewhere is
+        # the previous one, so it never fills the new version's fragment
+        'catalog_version': version,
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'home.html', context)
 
 def checkout(request):
-    settings, created = SiteSettings.objects.get_or_create(id=1)
-    context = {
-        'settings': settings,
-    }
-    return render(request, 'checkout.html', context)
+    return render(request, 'checkout.html')
+
+# Serve product images from the blob store. The URL is the content hash,
+# so the response never changes and can be cached forever.
+@etag(lambda request, image_hash: image_hash)
+def product_image(request, image_hash):
+    if not storage.image_exists(image_hash):
+        raise Http404('Image not found')
+    content_type = (
+        Product.objects.filter(image_hash=image_hash)
+        .values_list('image_content_type', flat=True)
+        .first()
+    )
+    response = FileResponse(
+        storage.open_image(image_hash),
+        content_type=content_type or 'application/octet-stream',
+    )
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@etag(lambda request, image_hash, variant: f'{image_hash}/{variant}')
+def product_image_variant(request, image_hash, variant):
+    ext = variant.rsplit('.', 1)[1]
+    backend = storage.get_storage()
+    key = f'{imaging.variant_folder(image_hash)}/{variant}'
+    if ext not in imaging.CONTENT_TYPES or not backend.exists(key):
+        raise Http404('Image not found')
+    response = FileResponse(backend.open(key, 'rb'), content_type=imaging.CONTENT_TYPES[ext])
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+# Prometheus scrape endpoint, summed over all workers (main/metrics.py)
+def metrics_view(request):
+    # Open without a token only in development
+    if not settings.METRICS_TOKEN and not settings.DEBUG:
+        raise Http404('Metrics are disabled')
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    response = HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE_LATEST)
+    response['Cache-Control'] = 'no-store'
+    return response
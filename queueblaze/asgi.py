@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'queueblaze.settings')
+# Serve checkout and inquiries through the batched async writers
+os.environ.setdefault('ASYNC_INGEST', 'True')
+# No persistent database connections in executor threads (settings.py)
+os.environ['SERVING_ASGI'] = 'True'
 
 application = get_asgi_application()
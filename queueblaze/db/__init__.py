@@ -0,0 +1,27 @@
+"""
+Instrumented database backends.
+
+They are the stock Django backends plus InstrumentationMixin; settings.py
+swaps them in for the engine DATABASE_URL names. The mixin:
+
+- times each connection acquire. With persistent connections that is a
+  fresh connect (TCP + TLS + auth); with the psycopg pool it is the wait
+  for a pooled connection. See main/dbstats.py.
+- passes queries through main.querystats, which counts and times them
+  for requests that are being sampled.
+"""
+import time
+
+
+class InstrumentationMixin:
+    def __init__(self, *args, **kwargs):
+        from main import querystats
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers.append(querystats.execute_wrapper)
+
+    def get_new_connection(self, conn_params):
+        from main import dbstats
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        dbstats.record_acquire(self.alias, time.perf_counter() - started)
+        return connection
@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from queueblaze.db import InstrumentationMixin
+
+
+class DatabaseWrapper(InstrumentationMixin, base.DatabaseWrapper):
+    pass
@@ -15,8 +15,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-5l5htu8nek-1xwzcaft%olv5x$hgd&n0s0(99+y1l0*ea16h!a')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-# DEBUG=True for local development
-DEBUG = True
+# DEBUG=True for local development; render.yaml sets DEBUG=False
+DEBUG = os.environ.get('DEBUG', 'True') == 'True'
 
 # ALLOWED_HOSTS - configure for production
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '').split(',') if os.environ.get('ALLOWED_HOSTS') else ['*']
@@ -33,11 +33,19 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # Full-text and trigram lookups for product search on PostgreSQL (main/search.py)
+    'django.contrib.postgres',
+    # runserver serves static files through WhiteNoise too, which answers
+    # Range requests (video seeking) with 206 Partial Content
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'main',
 ]
 
 MIDDLEWARE = [
+    'main.middleware.health_check_middleware',  # Platform health check, before the HTTPS redirect
+    'main.middleware.metrics_middleware',  # Latency and size per URL name for /metrics
+    'main.middleware.query_stats_middleware',  # SQL counts and timings, see main/querystats.py
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise for static files
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -60,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'main.context_processors.site_settings',
             ],
         },
     },
@@ -84,6 +93,126 @@ except ImportError:
         }
     }
 
+# Connection reuse - by default each worker thread keeps its connection for
+# DB_CONN_MAX_AGE seconds and checks it is still alive before reusing it.
+# DB_POOL=True switches PostgreSQL to a psycopg pool per worker process
+# instead, sized for the worker's GUNICORN_THREADS.
+# Under ASGI (queueblaze/asgi.py sets SERVING_ASGI) sync ORM calls run in
+# executor threads that never get the per-request connection cleanup, so
+# persistent connections would pile up: they are off there and the pool is
+# the default instead.
+SERVING_ASGI = os.environ.get('SERVING_ASGI', 'False') == 'True'
+DB_CONN_MAX_AGE = 0 if SERVING_ASGI else int(os.environ.get('DB_CONN_MAX_AGE', 600))
+DB_POOL = (os.environ.get('DB_POOL') or str(SERVING_ASGI)) == 'True'
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+
+DATABASES['default'].update(
+    CONN_MAX_AGE=DB_CONN_MAX_AGE,
+    CONN_HEALTH_CHECKS=os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+)
+# Same backends with connection acquire timing and per-request query stats
+# (queueblaze/db, main/dbstats.py, main/querystats.py)
+DATABASES['default']['ENGINE'] = {
+    'django.db.backends.postgresql': 'queueblaze.db.postgresql',
+    'django.db.backends.sqlite3': 'queueblaze.db.sqlite3',
+}.get(DATABASES['default']['ENGINE'], DATABASES['default']['ENGINE'])
+if DB_POOL and DATABASES['default']['ENGINE'] == 'queueblaze.db.postgresql':
+    # Pooled connections are returned after each request; Django refuses
+    # to combine the pool with persistent connections
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+        # One per request thread plus the async ingest writers
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', GUNICORN_THREADS + 2)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+
+# Cache - main/tiered_cache.py keeps a small in-process LRU (L1) in front of
+# the shared Redis cache (L2) when REDIS_URL is set, so every gunicorn worker
+# sees the same catalog cache while hot keys skip the network. Without Redis
+# the in-process tier is the whole cache, and keeps nothing longer than
+# CACHE_L1_TIMEOUT so every worker picks up catalog and settings changes.
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'main.tiered_cache.TieredCache',
+        'LOCATION': 'shared' if REDIS_URL else '',
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': int(os.environ.get('CACHE_L1_MAX_ENTRIES', 1000)),
+            # Longest a worker may serve a value another worker has replaced
+            'L1_TIMEOUT': float(os.environ.get('CACHE_L1_TIMEOUT', 5)),
+            # Seconds to stay on L1 alone after Redis fails
+            'RETRY_AFTER': float(os.environ.get('CACHE_REDIS_RETRY_AFTER', 30)),
+        },
+    },
+}
+if REDIS_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'queueblaze',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # Fail fast so an unreachable Redis degrades to L1 instead of stalling requests
+            'SOCKET_CONNECT_TIMEOUT': float(os.environ.get('CACHE_REDIS_CONNECT_TIMEOUT', 0.5)),
+            'SOCKET_TIMEOUT': float(os.environ.get('CACHE_REDIS_TIMEOUT', 0.5)),
+        },
+    }
+
+# Proxies in front of the app that append to X-Forwarded-For (Render's load
+# balancer); used to find the client IP for rate limiting. 0 trusts none.
+RATE_LIMIT_PROXY_COUNT = int(os.environ.get('RATE_LIMIT_PROXY_COUNT', 1))
+
+# Seconds to keep rendered home page fragments (product cards and grid);
+# 0 turns fragment caching off, e.g. for benchmarking
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Products rendered into the home page; main.js fetches the rest from the
+# catalog API as the grid scrolls into view. ?page_size= overrides it
+HOME_PAGE_SIZE = int(os.environ.get('HOME_PAGE_SIZE', 8))
+
+# Prerendered storefront for Netlify (`manage.py export_static_site`,
+# main/prerender.py): written to the directory netlify.toml publishes, with
+# checkout, the APIs and admin proxied to STATIC_SITE_ORIGIN.
+STATIC_SITE_DIR = os.environ.get('STATIC_SITE_DIR') or str(BASE_DIR)
+STATIC_SITE_ORIGIN = os.environ.get('STATIC_SITE_ORIGIN', '')
+# Netlify signs the requests it proxies here with this secret (set it under
+# the same name on Netlify). Those requests passed one more proxy than
+# RATE_LIMIT_PROXY_COUNT counts, so the rate limiter trusts one more
+# X-Forwarded-For entry on them; unsigned requests can't claim that hop.
+STATIC_SITE_PROXY_SECRET = os.environ.get('STATIC_SITE_PROXY_SECRET', '')
+
+# Admin dashboard sales rollups (main/rollups.py): add new orders to the
+# rollups and refresh a day's rows when one of its orders changes; with this
+# off, rely on a scheduled `manage.py refresh_sales_rollups` instead
+SALES_ROLLUP_ON_SAVE = os.environ.get('SALES_ROLLUP_ON_SAVE', 'True') == 'True'
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 30))  # seconds
+
+# Health check answered by main.middleware for the platform (render.yaml
+# healthCheckPath); add ?db=1 to also check the database
+HEALTH_CHECK_PATH = os.environ.get('HEALTH_CHECK_PATH', '/healthz')
+
+# Per-request query stats (main/querystats.py) for a sample of requests:
+# a Server-Timing header, plus warnings for requests slower than
+# SLOW_REQUEST_SECONDS and for the same query run QUERY_REPEAT_THRESHOLD
+# times or more (N+1). QUERY_BUDGET_ENFORCE turns @query_budget overruns
+# into errors (for tests) and records every request.
+QUERY_STATS_SAMPLE_RATE = float(os.environ.get('QUERY_STATS_SAMPLE_RATE', 1.0 if DEBUG else 0.05))
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 1.0))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 10))
+QUERY_BUDGET_ENFORCE = os.environ.get('QUERY_BUDGET_ENFORCE', 'False') == 'True'
+
+# Prometheus metrics at /metrics (main/metrics.py). Scrapers must send
+# METRICS_TOKEN as "Authorization: Bearer <token>"; without a token the
+# endpoint only answers with DEBUG on
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Async order/inquiry ingestion - queueblaze/asgi.py turns this on so the
+# checkout endpoints use the batched writers in main/ingest.py
+ASYNC_INGEST = os.environ.get('ASYNC_INGEST', 'False') == 'True'
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 50))
+INGEST_MAX_WAIT = float(os.environ.get('INGEST_MAX_WAIT', 0.02))  # seconds
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -121,9 +250,27 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+# Minified bundles and critical CSS from `manage.py build_assets`
+# (main/assets.py), collected along with static/
+ASSET_BUILD_DIR = BASE_DIR / 'build' / 'assets'
+if ASSET_BUILD_DIR.is_dir():
+    STATICFILES_DIRS.append(ASSET_BUILD_DIR)
+
+# Fingerprinted, gzip- and Brotli-compressed static files served by WhiteNoise
+# (STATICFILES_STORAGE is no longer read since Django 5.1)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'main.assets.StaticFilesStorage'},
+}
+
+
+# WhiteNoise serves byte ranges of every file; say so up front so video
+# players seek with Range requests instead of refetching the whole file
+def _static_headers(headers, path, url):
+    headers['Accept-Ranges'] = 'bytes'
+
 
-# WhiteNoise configuration for serving static files
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+WHITENOISE_ADD_HEADERS_FUNCTION = _static_headers
 
 # Media files
 MEDIA_URL = 'media/'
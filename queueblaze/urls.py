@@ -3,7 +3,7 @@ URL configuration for queueblaze project.
 Production-ready with WhiteNoise static files
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from main import views
@@ -13,6 +13,9 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.home, name='home'),
     path('checkout/', views.checkout, name='checkout'),
+    path('metrics', views.metrics_view, name='metrics'),
+    re_path(r'^media/products/(?P<image_hash>[0-9a-f]{64})$', views.product_image, name='product_image'),
+    re_path(r'^media/products/(?P<image_hash>[0-9a-f]{64})/(?P<variant>[a-z]+-\d+\.[a-z]+)$', views.product_image_variant, name='product_image_variant'),
     
     # Custom Admin URLs
     path('panel/login/', main_admin.admin_login, name='admin_login'),
@@ -20,18 +23,24 @@ urlpatterns = [
     path('panel/dashboard/', main_admin.admin_dashboard, name='admin_dashboard'),
     path('panel/products/', main_admin.admin_products, name='admin_products'),
     path('panel/products/add/', main_admin.admin_product_add, name='admin_product_add'),
+    path('panel/products/import/', main_admin.admin_product_import, name='admin_product_import'),
+    path('panel/products/export/', main_admin.admin_product_export, name='admin_product_export'),
     path('panel/products/edit/<int:product_id>/', main_admin.admin_product_edit, name='admin_product_edit'),
     path('panel/products/delete/<int:product_id>/', main_admin.admin_product_delete, name='admin_product_delete'),
     path('panel/orders/', main_admin.admin_orders, name='admin_orders'),
+    path('panel/orders/export/', main_admin.admin_orders_export, name='admin_orders_export'),
     path('panel/orders/<int:order_id>/', main_admin.admin_order_detail, name='admin_order_detail'),
     path('panel/orders/delete/<int:order_id>/', main_admin.admin_order_delete, name='admin_order_delete'),
+    path('panel/stats/', main_admin.admin_runtime_stats, name='admin_runtime_stats'),
     path('panel/settings/', main_admin.admin_settings, name='admin_settings'),
     
     # API URLs
     path('api/products/', main_admin.api_products, name='api_products'),
+    path('api/products/search/', main_admin.api_product_search, name='api_product_search'),
     path('api/settings/', main_admin.api_settings, name='api_settings'),
-    path('api/save-order/', main_admin.save_order, name='save_order'),
-    path('api/save-inquiry/', main_admin.save_inquiry, name='save_inquiry'),
+    # Batched async writers need the long-lived event loop of the ASGI server
+    path('api/save-order/', main_admin.save_order_async if settings.ASYNC_INGEST else main_admin.save_order, name='save_order'),
+    path('api/save-inquiry/', main_admin.save_inquiry_async if settings.ASYNC_INGEST else main_admin.save_inquiry, name='save_inquiry'),
 ]
 
 # Serve media files in development
@@ -54,7 +54,6 @@ const searchInput = document.getElementById('search-input');
 const contactForm = document.getElementById('contact-form');
 const themeToggle = document.getElementById('theme-toggle');
 const productsGrid = document.getElementById('products-grid');
-let originalProductsHTML = ''; // Store original products for restoration
 
 // ========================================
 // Initialize
@@ -67,6 +66,12 @@ document.addEventListener('DOMContentLoaded', () => {
     initViewMore();
 });
 
+// Background videos wait until the page has painted and loaded
+window.addEventListener('load', () => {
+    const start = window.requestIdleCallback || (callback => setTimeout(callback, 200));
+    start(initBackgroundVideos);
+});
+
 // ========================================
 // Age Verification
 // ========================================
@@ -89,31 +94,28 @@ ageDeny.addEventListener('click', () => {
 });
 
 // ========================================
-// Render Products (for filtering)
+// Product Cards (from the catalog API)
 // ========================================
-function renderProducts(products) {
-    if (products.length === 0) {
-        productsGrid.innerHTML = `
-            <div class="no-products" style="grid-column: 1/-1; text-align: center; padding: 60px 20px;">
-                <i class="fas fa-search" style="font-size: 3rem; color: var(--text-muted); margin-bottom: 20px;"></i>
-                <p style="color: var(--text-muted);">No products found matching your criteria</p>
-            </div>
-        `;
-        originalProductsHTML = ''; // Clear stored HTML
-        return;
-    }
-
-    // Store the original products HTML for restoration
-    originalProductsHTML = products.map(product => `
-        <div class="product-card" data-category="${product.category}" data-strain="${product.strain}" data-id="${product.id}" data-image="${product.image || ''}">
+// Same markup as the server-rendered cards in templates/home.html
+function productCardHTML(product) {
+    const name = escapeHTML(product.name);
+    const sources = (product.card || []).map(source =>
+        `<source type="${source.type}" srcset="${source.srcset}" sizes="(max-width: 576px) 100vw, (max-width: 992px) 50vw, 300px">`
+    ).join('');
+    const image = product.image
+        ? `<picture>${sources}<img src="${product.image}" alt="${name}" class="product-img" loading="lazy" decoding="async"></picture>`
+        : `<div class="product-placeholder">${escapeHTML(product.icon)}</div>`;
+
+    return `
+        <div class="product-card" data-category="${product.category}" data-strain="${product.strain}" data-id="${product.id}" data-image="${product.image ? (product.thumb || product.image) : ''}">
             <div class="product-image">
-                ${product.image ? `<img src="${product.image}" alt="${product.name}" class="product-img">` : `<div class="product-placeholder">${product.icon}</div>`}
+                ${image}
                 <span class="product-badge strain-${product.strain}">${capitalizeFirst(product.strain)}</span>
             </div>
             <div class="product-info">
-                <h3 class="product-name">${product.name}</h3>
+                <h3 class="product-name">${name}</h3>
                 <div class="product-meta">
-                    <span class="product-thc">${product.thc || '--'}</span>
+                    <span class="product-thc">${escapeHTML(product.thc) || '--'}</span>
                     <span class="product-price">R${product.price}</span>
                 </div>
                 <div class="product-actions">
@@ -125,11 +127,11 @@ function renderProducts(products) {
                     </button>
                 </div>
                 <div class="product-description" id="product-desc-${product.id}">
-                    ${product.description || 'No description available.'}
+                    ${escapeHTML(product.description) || 'No description available.'}
                 </div>
             </div>
         </div>
-    `).join('');
+    `;
 }
 
 // ========================================
@@ -302,8 +304,10 @@ function setupEventListeners() {
     // Search
     if (searchInput) {
         searchInput.addEventListener('input', (e) => {
-            searchQuery = e.target.value.toLowerCase();
-            filterProducts();
+            searchQuery = e.target.value.trim();
+            // Wait for a pause in typing before asking the server
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(filterProducts, 250);
         });
     }
 
@@ -387,115 +391,114 @@ function setupEventListeners() {
 }
 
 // ========================================
-// Filter Products
+// Product Grid
 // ========================================
-
-// View More Products
-let productsShown = 4;
-const productsPerLoad = 8;
-const mobileProductsShown = 2;
+// The server renders the first page; further pages come from the catalog
+// API as the grid scrolls into view (or View More is clicked), and the
+// filters query the search API instead of hiding downloaded cards
+const productFields = 'id,name,category,strain,thc,price,icon,image,thumb,card,description';
+let nextCursor = '';      // /api/products/ cursor while browsing
+let searchOffset = null;  // /api/products/search/ offset while filtering; null when done
+let browseState = null;   // The unfiltered grid, restored when the filters are cleared
+let loadingProducts = false;
+let productRequest = 0;   // Bumped by every filter change; older responses are dropped
+let searchTimer = null;
+
+const noProductsHTML = `
+    <div class="no-products" style="grid-column: 1/-1; text-align: center; padding: 60px 20px;">
+        <i class="fas fa-search" style="font-size: 3rem; color: var(--text-muted); margin-bottom: 20px;"></i>
+        <p style="color: var(--text-muted);">No products found matching your criteria</p>
+    </div>
+`;
 
 function initViewMore() {
-    const viewMoreContainer = document.getElementById('view-more-container');
-    const productCards = document.querySelectorAll('.product-card');
-    
-    // Check if mobile
-    const isMobile = window.innerWidth < 768;
-    
-    if (isMobile) {
-        // On mobile, show only 2 products initially
-        productCards.forEach((card, index) => {
-            if (index < mobileProductsShown) {
-                card.style.display = 'block';
-            } else {
-                card.style.display = 'none';
-            }
-        });
-        
-        // Show view more button if there are more than 2 products
-        if (productCards.length > mobileProductsShown && viewMoreContainer) {
-            viewMoreContainer.style.display = 'block';
-        }
-        
-        productsShown = mobileProductsShown;
-    } else {
-        // On desktop, show only first 4 products initially
-        productCards.forEach((card, index) => {
-            if (index < 4) {
-                card.style.display = 'block';
-            } else {
-                card.style.display = 'none';
-            }
-        });
-        
-        // Show view more button if there are more than 4 products
-        if (productCards.length > 4 && viewMoreContainer) {
-            viewMoreContainer.style.display = 'block';
-        }
-        
-        productsShown = 4;
+    if (!productsGrid) return;
+    nextCursor = productsGrid.dataset.nextCursor || '';
+    updateViewMore();
+
+    const container = document.getElementById('view-more-container');
+    if (container && 'IntersectionObserver' in window) {
+        new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting) viewMoreProducts();
+        }, { rootMargin: '400px 0px' }).observe(container);
     }
 }
 
-function viewMoreProducts() {
-    const productCards = Array.from(document.querySelectorAll('.product-card'));
-    const isMobile = window.innerWidth < 768;
-    const loadCount = isMobile ? 4 : 8;
-    
-    let shown = 0;
-    for (let i = 0; i < productCards.length; i++) {
-        if (productCards[i].style.display === 'none') {
-            productCards[i].style.display = 'block';
-            shown++;
-            if (shown >= loadCount) {
-                break;
-            }
-        }
-    }
-    
-    // Toggle buttons based on visibility
-    const viewMoreBtn = document.getElementById('btn-view-more');
-    const viewLessBtn = document.getElementById('btn-view-less');
-    const newVisibleCount = productCards.filter(card => card.style.display !== 'none').length;
-    
-    if (newVisibleCount >= productCards.length && viewMoreBtn) {
-        viewMoreBtn.classList.add('hidden');
-    }
-    if (viewLessBtn) {
-        viewLessBtn.classList.remove('hidden');
+function isFiltering() {
+    return currentCategory !== 'all' || currentStrain !== 'all' || searchQuery !== '';
+}
+
+function hasMoreProducts() {
+    return isFiltering() ? searchOffset !== null : nextCursor !== '';
+}
+
+function updateViewMore() {
+    const container = document.getElementById('view-more-container');
+    if (container) {
+        container.style.display = hasMoreProducts() ? 'block' : 'none';
     }
-    
-    // Apply current filters to newly shown products
-    filterProducts();
 }
 
-function viewLessProducts() {
-    const productCards = Array.from(document.querySelectorAll('.product-card'));
-    const isMobile = window.innerWidth < 768;
-    const initialCount = isMobile ? 2 : 4;
-    
-    // First, reset all cards to visible, then hide the ones beyond initial count
-    productCards.forEach(card => {
-        card.style.display = 'block';
-    });
-    
-    // Hide products beyond initial count
-    for (let i = initialCount; i < productCards.length; i++) {
-        productCards[i].style.display = 'none';
+// The observer only fires on changes; keep loading while the end of the grid is still near
+function loadMoreIfVisible() {
+    const container = document.getElementById('view-more-container');
+    if (container && hasMoreProducts() && container.getBoundingClientRect().top < window.innerHeight + 400) {
+        viewMoreProducts();
     }
-    
-    // Toggle buttons - show View More, hide View Less
-    const viewMoreBtn = document.getElementById('btn-view-more');
-    const viewLessBtn = document.getElementById('btn-view-less');
-    
-    if (viewMoreBtn) {
-        viewMoreBtn.classList.remove('hidden');
+}
+
+function pageSize() {
+    return parseInt(productsGrid.dataset.pageSize) || 8;
+}
+
+function searchURL(offset) {
+    const params = new URLSearchParams({ limit: pageSize(), offset: offset, fields: productFields });
+    if (currentCategory !== 'all') params.set('category', currentCategory);
+    if (currentStrain !== 'all') params.set('strain', currentStrain);
+    if (searchQuery) params.set('q', searchQuery);
+    return `/api/products/search/?${params}`;
+}
+
+async function fetchProducts(url) {
+    const response = await fetch(url, { headers: { 'Accept': 'application/json' } });
+    if (!response.ok) {
+        throw new Error(`Product request failed with ${response.status}`);
     }
-    if (viewLessBtn) {
-        viewLessBtn.classList.add('hidden');
+    return response.json();
+}
+
+async function viewMoreProducts() {
+    if (loadingProducts || !hasMoreProducts()) return;
+    loadingProducts = true;
+    const request = productRequest;
+
+    try {
+        let products;
+        if (isFiltering()) {
+            const data = await fetchProducts(searchURL(searchOffset));
+            if (request !== productRequest) return;
+            products = data.results;
+            const loaded = searchOffset + products.length;
+            searchOffset = products.length && loaded < data.total ? loaded : null;
+        } else {
+            const params = new URLSearchParams({ limit: pageSize(), cursor: nextCursor, fields: productFields });
+            const data = await fetchProducts(`/api/products/?${params}`);
+            if (request !== productRequest) return;
+            products = data.results;
+            nextCursor = data.next_cursor || '';
+        }
+        productsGrid.insertAdjacentHTML('beforeend', products.map(productCardHTML).join(''));
+    } catch (error) {
+        console.error('Error loading products:', error);
+        showToast('Could not load more products');
+        if (request !== productRequest) return;
+        // The View More button stays for a retry
+        loadingProducts = false;
+        return;
     }
-    
-    // IMPORTANT: Do NOT call filterProducts() here as it will override the view less functionality
+    loadingProducts = false;
+    updateViewMore();
+    loadMoreIfVisible();
 }
 
 // Toggle Product Description
@@ -506,56 +509,41 @@ function toggleProductInfo(productId) {
     }
 }
 
-function filterProducts() {
-    const productCards = document.querySelectorAll('.product-card');
-    
-    // When showing all (category is 'all'), restore all cards and remove message
-    if (currentCategory === 'all') {
-        productCards.forEach(card => {
-            card.style.display = 'block';
-        });
-        const noProductsMsg = productsGrid.querySelector('.no-products');
-        if (noProductsMsg) {
-            noProductsMsg.remove();
+async function filterProducts() {
+    clearTimeout(searchTimer);
+    const request = ++productRequest;
+
+    if (!isFiltering()) {
+        loadingProducts = false;
+        if (browseState) {
+            productsGrid.innerHTML = browseState.html;
+            nextCursor = browseState.cursor;
+            browseState = null;
         }
+        updateViewMore();
         return;
     }
-    
-    productCards.forEach(card => {
-        const category = card.dataset.category;
-        const strain = card.dataset.strain;
-        const name = card.querySelector('.product-name').textContent.toLowerCase();
-        
-        const categoryMatch = currentCategory === 'all' || category === currentCategory;
-        const strainMatch = currentStrain === 'all' || strain === currentStrain || strain === 'all';
-        const searchMatch = name.includes(searchQuery);
-        
-        if (categoryMatch && strainMatch && searchMatch) {
-            card.style.display = 'block';
-        } else {
-            card.style.display = 'none';
-        }
-    });
-    
-    // Check if any products are visible
-    const hasVisibleProducts = Array.from(productCards).some(card => card.style.display !== 'none');
-    
-    // Remove any existing no-products message FIRST
-    const existingNoProducts = productsGrid.querySelector('.no-products');
-    if (existingNoProducts) {
-        existingNoProducts.remove();
+
+    if (!browseState) {
+        browseState = { html: productsGrid.innerHTML, cursor: nextCursor };
     }
-    
-    // Now show message only if no products visible
-    if (!hasVisibleProducts && productCards.length > 0) {
-        // Insert message at the beginning
-        productsGrid.insertAdjacentHTML('afterbegin', `
-            <div class="no-products" style="grid-column: 1/-1; text-align: center; padding: 60px 20px;">
-                <i class="fas fa-search" style="font-size: 3rem; color: var(--text-muted); margin-bottom: 20px;"></i>
-                <p style="color: var(--text-muted);">No products found matching your criteria</p>
-            </div>
-        `);
+    // No further pages until the first one of these filters is in
+    loadingProducts = true;
+    searchOffset = null;
+    try {
+        const data = await fetchProducts(searchURL(0));
+        if (request !== productRequest) return;
+        const products = data.results;
+        productsGrid.innerHTML = products.length ? products.map(productCardHTML).join('') : noProductsHTML;
+        searchOffset = products.length && products.length < data.total ? products.length : null;
+    } catch (error) {
+        if (request !== productRequest) return;
+        console.error('Error filtering products:', error);
+        showToast('Could not load products');
     }
+    loadingProducts = false;
+    updateViewMore();
+    loadMoreIfVisible();
 }
 
 // ========================================
@@ -587,6 +575,35 @@ function updateThemeIcon(theme) {
     }
 }
 
+// ========================================
+// Background Videos
+// ========================================
+function initBackgroundVideos() {
+    const connection = navigator.connection || {};
+    // Keep the poster for visitors who asked for less motion or less data
+    if (connection.saveData || window.matchMedia('(prefers-reduced-motion: reduce)').matches) return;
+
+    document.querySelectorAll('video[data-renditions]').forEach(video => {
+        const rendition = pickRendition(JSON.parse(video.dataset.renditions), video, connection);
+        video.src = rendition.src;
+        video.play().catch(() => {});
+    });
+}
+
+// Under the hero overlay a video can be stretched this much before it shows
+const maxVideoUpscale = 1.5;
+
+// Smallest rendition that covers the element (object-fit: cover) in CSS pixels
+function pickRendition(renditions, video, connection) {
+    const sized = renditions.filter(r => r.height).sort((a, b) => a.height - b.height);
+    if (!sized.length) return renditions[0];
+    if (/2g/.test(connection.effectiveType || '')) return sized[0];
+
+    const box = video.parentElement.getBoundingClientRect();
+    return sized.find(r => Math.max(box.width / r.width, box.height / r.height) <= maxVideoUpscale)
+        || sized[sized.length - 1];
+}
+
 // ========================================
 // Utility Functions
 // ========================================
@@ -595,6 +612,13 @@ function capitalizeFirst(str) {
     return str.charAt(0).toUpperCase() + str.slice(1);
 }
 
+function escapeHTML(str) {
+    if (!str) return '';
+    return String(str).replace(/[&<>"']/g, char => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[char]);
+}
+
 // Get CSRF token for AJAX requests
 function getCookie(name) {
     let cookieValue = null;